@@ -0,0 +1,116 @@
+"""Load time and memory of the model artifact against ``pickle.load``.
+
+Each measurement runs in a fresh interpreter that has already imported
+numpy and pandas (as the app always has). Importing lightgbm, which both
+formats need for the booster, is timed separately from the load itself. The
+model + encoder RSS is the resident size of one loaded copy, measured here
+rather than inside the app.
+
+The ``pickle.load`` baseline unpickles the shipped booster and encoder
+vocabularies, written to a temporary pickle in the layout
+:func:`utils.artifact.read_pickle` accepts, so both formats are measured
+from the tree alone. The notebook pickle that shipped before the artifact
+(an ``LGBMRegressor``; unpickling it needs scikit-learn) can be timed
+instead with ``--pickle``; it is still in the repository history:
+
+    python -m benchmarks.bench_artifact --repeat 5
+    git show f23463a:model.pkl > old_model.pkl
+    python -m benchmarks.bench_artifact --repeat 5 --pickle old_model.pkl
+"""
+import argparse
+import json
+import pickle
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Runs inside the child interpreter; prints one JSON line
+CHILD = r"""
+import json, os, sys, time, warnings
+warnings.filterwarnings("ignore")
+sys.path.insert(0, {root!r})
+import numpy, pandas
+
+def rss():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+import_seconds = 0.0
+if {mode!r} != "manifest":
+    start = time.perf_counter()
+    import lightgbm
+    import_seconds = time.perf_counter() - start
+
+before = rss()
+start = time.perf_counter()
+from utils import artifact
+if {mode!r} == "pickle":
+    model, encoder = artifact.read_pickle({legacy!r})
+else:
+    manifest = artifact.read_manifest({directory!r})
+    if {mode!r} == "artifact":
+        model = artifact.load_model({directory!r}, manifest)
+        encoder = artifact.load_encoder({directory!r}, manifest)
+seconds = time.perf_counter() - start
+print(json.dumps({{"import_seconds": import_seconds, "seconds": seconds, "rss_mb": (rss() - before) / 2**20}}))
+"""
+
+MODES = {
+    "pickle": "pickle.load",
+    "manifest": "artifact manifest only",
+    "artifact": "artifact model + encoder",
+}
+
+
+def measure(mode, legacy=None):
+    from utils.model_registry import MODEL_PATH
+
+    code = CHILD.format(root=str(ROOT), mode=mode, legacy=str(legacy), directory=str(MODEL_PATH))
+    out = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def write_pickle(path):
+    """Pickle the shipped booster and encoder vocabularies to ``path``."""
+    from utils.model_registry import get_model
+
+    bundle = get_model().load_all()
+    with open(path, "wb") as f:
+        pickle.dump({"model": bundle.model, "encoder": bundle.encoder.to_dict()}, f,
+                    protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--pickle", help="notebook pickle to time pickle.load on instead of the shipped model")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy = args.pickle
+        if legacy is None:
+            legacy = Path(tmp) / "model.pkl"
+            write_pickle(legacy)
+        results = run(args.repeat, legacy)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+
+
+def run(repeat, legacy):
+    results = []
+    for mode, label in MODES.items():
+        runs = [measure(mode, legacy) for _ in range(repeat)]
+        best = min(runs, key=lambda r: r["seconds"])
+        results.append({"mode": mode, **best})
+        print(f"{label:<26} {best['seconds'] * 1000:8.1f} ms load {best['rss_mb']:7.1f} MB RSS"
+              f"  (+{best['import_seconds'] * 1000:.0f} ms importing lightgbm)")
+    return results
+
+
+if __name__ == "__main__":
+    main()
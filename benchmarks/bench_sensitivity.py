@@ -0,0 +1,67 @@
+"""Latency of a what-if sensitivity sweep: one batched call vs a call per point.
+
+The mileage sweep is stretched so the grid has ``--points`` rows in total,
+on top of every year 1975-2023 and every engine and drive type. Listings are
+sampled from the cleaned dataset. Run from the repository root:
+
+    python -m benchmarks.bench_sensitivity --points 1000 --repeat 50
+"""
+import argparse
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+
+from utils.data import load_dataset
+from utils.encoding import FEATURES
+from utils.model_registry import get_model
+from utils.sensitivity import CATEGORICAL_SWEEPS, NUMERIC_SWEEPS, sweep, sweep_grid
+
+
+def percentiles(seconds):
+    ms = np.asarray(seconds) * 1000
+    return {"p50_ms": float(np.percentile(ms, 50)), "p95_ms": float(np.percentile(ms, 95))}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--points", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--loop-repeat", type=int, default=3, help="repeats of the per-point baseline")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    bundle = get_model()
+    listings = load_dataset().clean[FEATURES].sample(args.repeat, replace=True, random_state=0)
+    rows = [bundle.encoder.transform_row(listing) for listing in listings.to_dict("records")]
+
+    fixed = len(NUMERIC_SWEEPS["year"]) + sum(len(bundle.encoder.vocabularies[col]) for col in CATEGORICAL_SWEEPS)
+    numeric = {"mileage": np.linspace(0, 600, max(args.points - fixed, 1)), "year": NUMERIC_SWEEPS["year"]}
+    points = len(sweep_grid(bundle.encoder, rows[0], numeric)[0])
+    sweep(bundle, rows[0], numeric)  # warm up
+
+    batched = []
+    for row in rows:
+        start = time.perf_counter()
+        sweep(bundle, row, numeric)
+        batched.append(time.perf_counter() - start)
+
+    looped = []
+    for row in rows[:args.loop_repeat]:
+        X, _ = sweep_grid(bundle.encoder, row, numeric)
+        start = time.perf_counter()
+        for point in X:
+            bundle.model.predict([list(point)])
+        looped.append(time.perf_counter() - start)
+
+    results = {"points": points, "batched": percentiles(batched), "per_point": percentiles(looped)}
+    print(f"sweep of {points} points")
+    print(f"batched    p50 {results['batched']['p50_ms']:8.2f} ms   p95 {results['batched']['p95_ms']:8.2f} ms")
+    print(f"per point  p50 {results['per_point']['p50_ms']:8.2f} ms   p95 {results['per_point']['p95_ms']:8.2f} ms")
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""Memory report: process RSS as simulated browser sessions accumulate.
+
+Every simulated session runs the data pages headlessly through Streamlit's
+``AppTest`` and is kept alive, as an open browser tab keeps its session.
+``shared`` is the app as shipped: one compact, memory-mapped dataset per
+process. ``copies`` adds what each session used to hold on top of that: its
+own object-dtype parse of the CSV plus the ``df.copy()`` frames the Data
+Explorer and Feature Relationships pages made. Each mode runs in a fresh
+interpreter. Run from the repository root:
+
+    python -m benchmarks.bench_sessions --sessions 1 10 100
+"""
+import argparse
+import gc
+import json
+import logging
+import subprocess
+import sys
+import time
+import warnings
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+PAGES = [
+    "pages/1_Data_Explorer.py",
+    "pages/2_Feature_Relationships.py",
+    "pages/3_Price_Predictor.py",
+]
+MODES = ("shared", "copies")
+
+
+def legacy_frames():
+    """The frames one session held before the dataset was shared.
+
+    Each of the two data pages parsed the CSV into object columns itself and
+    collapsed rare labels with a dict map, so every frame stays object-dtype.
+    """
+    import pandas as pd
+
+    from utils.data import DATA_PATH, SHORTENED_COLUMNS, clean
+
+    def parse():
+        df = pd.read_csv(DATA_PATH, encoding="ISO-8859-1", sep=";").drop(columns="Unnamed: 0")
+        df = df.astype({col: object for col in df.columns if not pd.api.types.is_numeric_dtype(df[col])})
+        return df.dropna()
+
+    def cleaned(df):
+        return clean(df).astype({col: object for col in SHORTENED_COLUMNS})
+
+    # Data Explorer: the cleaned frame, df_raw = df.copy() and the top-10 copy
+    df_raw = parse().copy()
+    explorer = [cleaned(df_raw), df_raw, df_raw.copy()]
+    # Feature Relationships: its own parse and cleaned frame, and df_corr = df.copy()
+    df = cleaned(parse())
+    return explorer + [df, df.copy()]
+
+
+def run(mode, checkpoints):
+    """Open sessions one by one, yielding a report row at each checkpoint."""
+    from streamlit.testing.v1 import AppTest
+
+    from utils.data import load_dataset
+    from utils.instrumentation import rss_bytes
+
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+    warnings.filterwarnings("ignore")
+
+    sessions, baseline = [], None
+    start = time.perf_counter()
+    for n in range(1, max(checkpoints) + 1):
+        apps = [AppTest.from_file(str(ROOT / page), default_timeout=300).run() for page in PAGES]
+        errors = [e.value for app in apps for e in app.exception]
+        if errors:
+            raise RuntimeError(f"session {n}: {errors}")
+        sessions.append((apps, legacy_frames() if mode == "copies" else []))
+        if n in checkpoints:
+            gc.collect()
+            rss = rss_bytes()
+            baseline = rss if baseline is None else baseline
+            dataset = load_dataset()
+            yield {
+                "mode": mode,
+                "sessions": n,
+                "rss_mb": rss / 2**20,
+                "per_session_kb": (rss - baseline) / 1024 / max(n - min(checkpoints), 1),
+                "dataset_mb": sum(getattr(dataset, name).memory_usage(deep=True).sum()
+                                  for name in ("raw", "complete", "clean")) / 2**20,
+                "seconds": time.perf_counter() - start,
+            }
+
+
+def measure(mode, checkpoints):
+    command = [sys.executable, "-m", "benchmarks.bench_sessions", "--mode", mode,
+               "--sessions", *map(str, checkpoints)]
+    out = subprocess.run(command, cwd=ROOT, check=True, capture_output=True, text=True)
+    return [json.loads(line) for line in out.stdout.splitlines() if line.startswith("{")]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--mode", choices=MODES, help="measure one mode in this interpreter")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args(argv)
+    checkpoints = sorted(set(args.sessions))
+
+    if args.mode:
+        sys.path.insert(0, str(ROOT))
+        for row in run(args.mode, checkpoints):
+            print(json.dumps(row), flush=True)
+        return
+
+    results = []
+    for mode in MODES:
+        for row in measure(mode, checkpoints):
+            results.append(row)
+            print(f"{mode:<7} {row['sessions']:>4} sessions  {row['rss_mb']:8.1f} MB RSS  "
+                  f"{row['per_session_kb']:8.1f} KB/session  ({row['seconds']:.0f} s)")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Scaling of the global TreeSHAP pass with the number of worker processes.
+
+Explains the encoded dataset (replicated ``--scale`` times) serially and
+with each ``--workers`` count, checks every parallel result is identical to
+the serial one and reports the speed-up. Worker counts above the number of
+CPUs only measure the pool overhead.
+
+    python -m benchmarks.bench_shap --workers 1 2 4 8 --scale 4
+"""
+import argparse
+import json
+import os
+import time
+import warnings
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from utils.data import load_encoded
+from utils.model_registry import get_model
+from utils.shap_cache import compute_shap_values
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--scale", type=int, default=1, help="row multiplier")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args(argv)
+    warnings.filterwarnings("ignore")
+
+    X = load_encoded()
+    X = pd.concat([X] * args.scale, ignore_index=True) if args.scale > 1 else X
+    model = get_model().model
+    print(f"{len(X)} rows, {os.cpu_count()} CPUs")
+
+    start = time.perf_counter()
+    serial = compute_shap_values(model, X, workers=1)
+    serial_seconds = time.perf_counter() - start
+    results = [{"workers": 1, "seconds": serial_seconds, "speedup": 1.0, "identical": True}]
+    print(f"workers=1   {serial_seconds:8.2f} s")
+
+    for workers in args.workers:
+        if workers == 1:
+            continue
+        start = time.perf_counter()
+        values, base_values = compute_shap_values(model, X, workers=workers)
+        seconds = time.perf_counter() - start
+        identical = np.array_equal(values, serial[0]) and np.array_equal(base_values, serial[1])
+        results.append({"workers": workers, "seconds": seconds,
+                        "speedup": serial_seconds / seconds, "identical": identical})
+        print(f"workers={workers:<3} {seconds:8.2f} s  x{serial_seconds / seconds:.2f}"
+              f"  {'identical' if identical else 'MISMATCH'}")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(
+            {"rows": len(X), "cpus": os.cpu_count(), "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Compare cold-load time and peak RSS of the CSV parse against the snapshot.
+
+Each measurement runs in a fresh interpreter so nothing is shared between
+runs. ``--scale N`` replicates the listings N times into a temporary CSV to
+see how both paths grow with the file size.
+
+    python -m benchmarks.bench_snapshot --scale 1 --scale 100 --repeat 3
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Runs inside the child interpreter; prints one JSON line
+CHILD = r"""
+import json, resource, sys, time
+from pathlib import Path
+sys.path.insert(0, {root!r})
+from utils import data, snapshot
+
+path = Path({path!r})
+start = time.perf_counter()
+if {mode!r} == "csv":
+    raw = data.read_raw(path)
+    clean = data.clean(raw)
+else:
+    frames, meta = snapshot.load(data.file_signature(path), root={snapshot_root!r})
+    raw, clean = frames["raw"], frames["clean"]
+seconds = time.perf_counter() - start
+print(json.dumps({{
+    "seconds": seconds,
+    "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "raw_rows": len(raw),
+    "clean_rows": len(clean),
+}}))
+"""
+
+
+def scaled_csv(scale, directory):
+    """Write the listings ``scale`` times over into ``directory`` and return its path."""
+    source = ROOT / "car_ad_display.csv"
+    if scale == 1:
+        return source
+    target = Path(directory) / f"car_ad_display_x{scale}.csv"
+    with open(source, "rb") as f:
+        header, *rows = f.read().splitlines(keepends=True)
+    with open(target, "wb") as f:
+        f.write(header)
+        for _ in range(scale):
+            f.writelines(rows)
+    return target
+
+
+def measure(mode, path, snapshot_root):
+    code = CHILD.format(root=str(ROOT), path=str(path), mode=mode, snapshot_root=str(snapshot_root))
+    out = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", type=int, action="append", help="row multiplier (repeatable)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, str(ROOT))
+    from utils import data, snapshot
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        snapshot_root = Path(tmp) / "snapshots"
+        for scale in args.scale or [1]:
+            path = scaled_csv(scale, tmp)
+            raw = data.read_raw(path)
+            snapshot.write(data.file_signature(path), data.derive_frames(raw),
+                           snapshot.file_hash(path), root=snapshot_root)
+            del raw
+
+            for mode in ("csv", "snapshot"):
+                runs = [measure(mode, path, snapshot_root) for _ in range(args.repeat)]
+                best = min(runs, key=lambda r: r["seconds"])
+                results.append({"scale": scale, "mode": mode, "file_mb": os.path.getsize(path) / 2**20, **best})
+                print(f"x{scale:<6} {mode:<9} {best['seconds'] * 1000:9.1f} ms "
+                      f"{best['max_rss_mb']:8.1f} MB RSS  ({best['raw_rows']} rows)")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Load test for ``prediction_service.py`` running on localhost.
+
+Sends single-listing requests from many concurrent client threads and
+reports client-side latency percentiles and throughput next to the server's
+own ``/stats``.
+
+    python prediction_service.py &
+    python -m benchmarks.loadtest --concurrency 32 --requests 2000
+"""
+import argparse
+import json
+import random
+import sys
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def sample_listings(n, seed=0):
+    sys.path.insert(0, str(ROOT))
+    from utils.data import load_dataset
+    from utils.encoding import FEATURES
+
+    clean = load_dataset().clean[FEATURES]
+    rows = clean.sample(n, replace=True, random_state=seed)
+    return [{k: (v.item() if hasattr(v, "item") else v) for k, v in row.items()}
+            for row in rows.astype(object).to_dict("records")]
+
+
+def post(url, listing):
+    body = json.dumps(listing).encode("utf-8")
+    request = urllib.request.Request(url, data=body, headers={"Content-Type": "application/json"})
+    start = time.perf_counter()
+    with urllib.request.urlopen(request) as response:
+        response.read()
+    return time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    listings = sample_listings(args.requests)
+    random.shuffle(listings)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        latencies = np.array(list(pool.map(lambda l: post(args.url + "/predict", l), listings))) * 1000
+    elapsed = time.perf_counter() - start
+
+    with urllib.request.urlopen(args.url + "/stats") as response:
+        server = json.load(response)
+
+    print(f"requests      {len(latencies)} with {args.concurrency} concurrent clients")
+    print(f"throughput    {len(latencies) / elapsed:.0f} req/s")
+    print(f"client p50    {np.percentile(latencies, 50):.2f} ms")
+    print(f"client p99    {np.percentile(latencies, 99):.2f} ms")
+    print(f"server stats  {json.dumps(server)}")
+
+
+if __name__ == "__main__":
+    main()
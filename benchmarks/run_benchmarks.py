@@ -0,0 +1,354 @@
+"""Benchmark suite covering every page's pipeline stages.
+
+Times each stage on the shipped dataset and on synthetically scaled copies
+(the listings replicated N times), then runs every page headlessly through
+Streamlit's ``AppTest``, each in a fresh interpreter so its first run is cold.
+The Explainability figures are timed at the ``--shap-scales``, where the full
+TreeSHAP pass they are drawn from is run. Results are written as JSON so
+runs from different commits can be compared. Run from the repository root:
+
+    python -m benchmarks.run_benchmarks --output bench.json
+    python -m benchmarks.run_benchmarks --scales 1 10 100 1000 --shap-scales 1 10
+    python -m benchmarks.run_benchmarks --output new.json --compare bench.json
+"""
+import argparse
+import gc
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+from datetime import datetime, timezone
+from pathlib import Path
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+import seaborn as sns
+
+from benchmarks.bench_snapshot import scaled_csv
+from utils import data
+from utils.binning import bin_edges, density_grid, plot_density
+from utils.categories import CategoryCollapser
+from utils.correlation import COLUMNS, accumulate
+from utils.cube import PriceCube
+from utils.distributions import DistributionSummary
+from utils.encoding import FEATURES
+from utils.model_registry import get_model
+from utils.sampling import mean_abs_shap, strata, stratified_sample
+from utils.sensitivity import sweep
+
+ROOT = Path(__file__).resolve().parent.parent
+
+PAGES = [
+    "streamlit_app.py",
+    "pages/1_Data_Explorer.py",
+    "pages/2_Feature_Relationships.py",
+    "pages/3_Price_Predictor.py",
+    "pages/4_Explainability.py",
+]
+
+# Runs one page in a fresh interpreter; prints one JSON line
+PAGE_CHILD = r"""
+import json, sys, time, warnings
+warnings.filterwarnings("ignore")
+sys.path.insert(0, {root!r})
+from streamlit.testing.v1 import AppTest
+
+app = AppTest.from_file({page!r}, default_timeout={timeout!r})
+start = time.perf_counter()
+app.run()
+first = time.perf_counter() - start
+reruns = []
+for _ in range({repeat!r}):
+    start = time.perf_counter()
+    app.run()
+    reruns.append(time.perf_counter() - start)
+print(json.dumps({{"first_run_seconds": first, "rerun_seconds": min(reruns),
+                  "exceptions": [str(e.value) for e in app.exception]}}))
+"""
+
+
+def timeit(fn, repeat):
+    """Best wall time of ``repeat`` calls, plus the last return value."""
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def render(fig):
+    fig.canvas.draw()
+    plt.close(fig)
+
+
+def render_current():
+    """Render the figure a shap plot drew into, then close every figure."""
+    plt.gcf().canvas.draw()
+    plt.close("all")
+
+
+# -- figure rendering, one function per page tab ---------------------------
+
+def render_numeric_distributions(clean):
+    for col in ["price", "mileage", "engV", "year"]:
+        fig, ax = plt.subplots(figsize=(4.2, 2.7))
+        DistributionSummary(clean[col].to_numpy()).plot(ax)
+        render(fig)
+
+
+def render_categorical_distributions(clean):
+    for col in ["body", "engType", "drive", "registration"]:
+        fig, ax = plt.subplots(figsize=(4.2, 2.4))
+        sns.countplot(x=col, data=clean, ax=ax)
+        render(fig)
+
+
+def render_top_expensive(complete, clean):
+    top = complete.loc[PriceCube.from_frame(complete).top(10, by=["car", "model"])["row"]]
+    top = top.assign(label=top["car"].astype(str) + " " + top["model"].astype(str))
+    fig, ax = plt.subplots(figsize=(9, 4))
+    sns.barplot(data=top, x="label", y="price", ax=ax)
+    render(fig)
+    mean_price = PriceCube.from_frame(clean).mean("car").sort_values(ascending=False).head(10)
+    fig, ax = plt.subplots(figsize=(9, 4))
+    sns.barplot(x=mean_price.index.astype(str), y=mean_price.values, ax=ax)
+    render(fig)
+
+
+def render_numeric_vs_price(clean):
+    for col in ["mileage", "engV", "year"]:
+        x_edges, y_edges = bin_edges(clean[col].to_numpy()), bin_edges(clean["price"].to_numpy())
+        fig, ax = plt.subplots(figsize=(4.3, 3))
+        plot_density(ax, density_grid(clean[col], clean["price"], x_edges, y_edges), x_edges, y_edges)
+        render(fig)
+
+
+def render_categorical_vs_price(clean):
+    cube = PriceCube.from_frame(clean)
+    for col in ["body", "engType", "drive", "registration"]:
+        fig, ax = plt.subplots(figsize=(4.8, 3))
+        ax.bxp(cube.box_stats(col), widths=0.8, patch_artist=True)
+        render(fig)
+
+
+def render_correlation(clean, encoder):
+    corr = accumulate([clean], encoder, COLUMNS).correlation()
+    fig, ax = plt.subplots(figsize=(8, 6))
+    sns.heatmap(corr, vmin=-1, vmax=1, cmap="icefire", ax=ax)
+    render(fig)
+
+
+def render_sensitivity(clean, bundle):
+    row = bundle.encoder.transform_row(clean.iloc[0])
+    curves = sweep(bundle, row)
+    fig, axes = plt.subplots(2, 2, figsize=(9, 6))
+    for ax, (col, curve) in zip(axes.flat, curves.items()):
+        if col in bundle.encoder.vocabularies:
+            ax.bar(curve.index.astype(str), curve.to_numpy())
+        else:
+            ax.plot(curve.index, curve.to_numpy())
+    plt.tight_layout()
+    render(fig)
+
+
+def render_shap_global(clean, explanation, X, budget=2_000):
+    import shap
+
+    row_strata = strata(clean)
+    rows = stratified_sample(row_strata, budget)
+    importance = mean_abs_shap(explanation.values, row_strata, rows, X.columns)
+    plt.figure(figsize=(8, 5))
+    shap.summary_plot(explanation[rows], X.iloc[rows], show=False)
+    render_current()
+    fig, ax = plt.subplots(figsize=(6, 4))
+    ordered = importance.iloc[::-1]
+    ax.barh(ordered.index, ordered["mean_abs"], xerr=1.96 * ordered["std_error"])
+    render(fig)
+
+
+def render_shap_local(explanation, X, idx=0):
+    import shap
+
+    local = explanation[idx]
+    plt.figure(figsize=(7, 5))
+    shap.plots.waterfall(local, show=False)
+    render_current()
+    shap.force_plot(local.base_values, local.values, X.iloc[idx], matplotlib=True, show=False)
+    render_current()
+    plt.figure(figsize=(8, 4))
+    shap.decision_plot(local.base_values, local.values, X.iloc[idx], show=False)
+    render_current()
+
+
+def render_shap_dependence(explanation, X):
+    import shap
+
+    shap.dependence_plot("mileage", explanation.values, X, interaction_index="engV", show=False)
+    render_current()
+
+
+FIGURE_STAGES = {
+    "render.explorer.numeric_distributions": lambda d, b: render_numeric_distributions(d.clean),
+    "render.explorer.categorical_distributions": lambda d, b: render_categorical_distributions(d.clean),
+    "render.explorer.top_expensive": lambda d, b: render_top_expensive(d.complete, d.clean),
+    "render.relationships.numeric_vs_price": lambda d, b: render_numeric_vs_price(d.clean),
+    "render.relationships.categorical_vs_price": lambda d, b: render_categorical_vs_price(d.clean),
+    "render.relationships.correlation": lambda d, b: render_correlation(d.clean, b.encoder),
+    "render.predictor.sensitivity": lambda d, b: render_sensitivity(d.clean, b),
+}
+
+# Called with the dataset, the full SHAP explanation and the encoded features
+SHAP_FIGURE_STAGES = {
+    "render.explainability.global": lambda d, e, X: render_shap_global(d.clean, e, X),
+    "render.explainability.local": lambda d, e, X: render_shap_local(e, X),
+    "render.explainability.dependence": lambda d, e, X: render_shap_dependence(e, X),
+}
+
+
+# -- stages ----------------------------------------------------------------
+
+def bench_scale(scale, path, args, bundle):
+    results = []
+
+    def record(stage, seconds, rows):
+        results.append({"stage": stage, "scale": scale, "rows": rows, "seconds": seconds,
+                        "rows_per_second": rows / seconds if seconds > 0 else None})
+        print(f"  x{scale:<5} {stage:<45} {seconds * 1000:10.2f} ms  ({rows} rows)")
+
+    seconds, raw = timeit(lambda: data.read_raw(path), args.repeat)
+    record("load.csv", seconds, len(raw))
+
+    complete = raw.dropna()
+    seconds, _ = timeit(lambda: {c: CategoryCollapser(data.CATEGORY_CUTOFF).fit_transform(complete[c])
+                                 for c in data.SHORTENED_COLUMNS}, args.repeat)
+    record("clean.collapse_categories", seconds, len(complete))
+    seconds, clean = timeit(lambda: data.clean(raw), args.repeat)
+    record("clean.full", seconds, len(raw))
+
+    seconds, (X, _) = timeit(lambda: bundle.encoder.encode(clean), args.repeat)
+    record("encode.frame", seconds, len(clean))
+    X = pd.DataFrame(X, columns=FEATURES)
+
+    single = X.iloc[[0]]
+    seconds, _ = timeit(lambda: bundle.model.predict(single), max(args.repeat, 20))
+    record("predict.single_row", seconds, 1)
+    row = bundle.encoder.transform_row(clean.iloc[0])
+    seconds, _ = timeit(lambda: bundle.model.predict([row]), max(args.repeat, 20))
+    record("predict.single_row_list", seconds, 1)
+    seconds, _ = timeit(lambda: bundle.model.predict(X), args.repeat)
+    record("predict.batch", seconds, len(X))
+
+    dataset = data.Dataset(raw=raw, complete=complete, clean=clean, fingerprint=f"bench-x{scale}")
+    for stage, fn in FIGURE_STAGES.items():
+        seconds, _ = timeit(lambda: fn(dataset, bundle), args.repeat)
+        record(stage, seconds, len(clean))
+
+    if scale in args.shap_scales:
+        import shap
+
+        explainer = shap.TreeExplainer(bundle.model)
+        seconds, _ = timeit(lambda: explainer(X.iloc[[0]]), max(args.repeat, 20))
+        record("explain.single_row", seconds, 1)
+        seconds, explanation = timeit(lambda: explainer(X), 1)
+        record("explain.tree_explainer_full", seconds, len(X))
+        for stage, fn in SHAP_FIGURE_STAGES.items():
+            seconds, _ = timeit(lambda: fn(dataset, explanation, X), args.repeat)
+            record(stage, seconds, len(clean))
+    return results
+
+
+def bench_pages(args):
+    """Cold first run and warm rerun of every page through ``AppTest``.
+
+    Each page runs in a fresh interpreter, so the first run pays for imports
+    and in-process caches as a newly started server would. On-disk caches
+    (the dataset snapshot, SHAP values) are left as they are.
+    """
+    results = []
+    for page in PAGES:
+        code = PAGE_CHILD.format(root=str(ROOT), page=str(ROOT / page), timeout=args.page_timeout,
+                                 repeat=max(args.repeat, 1))
+        out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, check=True, capture_output=True, text=True)
+        run = json.loads(out.stdout.strip().splitlines()[-1])
+        results.append({"stage": f"page.{Path(page).stem}", **run})
+        errors = run["exceptions"]
+        print(f"  {page:<40} first {run['first_run_seconds'] * 1000:9.1f} ms  "
+              f"rerun {run['rerun_seconds'] * 1000:9.1f} ms" + (f"  ERRORS: {errors}" if errors else ""))
+    return results
+
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    import lightgbm
+    import streamlit
+
+    return {
+        "commit": commit,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "lightgbm": lightgbm.__version__,
+        "streamlit": streamlit.__version__,
+    }
+
+
+def compare(current, baseline_path):
+    """Print the ratio of each stage's time to the same stage in ``baseline_path``."""
+    baseline = json.loads(Path(baseline_path).read_text())
+    old = {(r["stage"], r.get("scale")): r for r in baseline["stages"] + baseline["pages"]}
+    print(f"\nComparison with {baseline_path} ({baseline['environment'].get('commit')}):")
+    for r in current["stages"] + current["pages"]:
+        before = old.get((r["stage"], r.get("scale")))
+        if before is None:
+            continue
+        field = "seconds" if "seconds" in r else "rerun_seconds"
+        ratio = r[field] / before[field] if before[field] else float("nan")
+        flag = "  <-- slower" if ratio > 1.2 else ""
+        scale = f"x{r['scale']}" if "scale" in r else ""
+        print(f"  {r['stage']:<45} {scale:<6} {ratio:6.2f}x{flag}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--shap-scales", type=int, nargs="*", default=[1])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--skip-pages", action="store_true")
+    parser.add_argument("--page-timeout", type=float, default=600)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--compare", help="earlier JSON results to compare against")
+    args = parser.parse_args(argv)
+    warnings.filterwarnings("ignore")
+
+    bundle = get_model()
+    report = {"environment": environment(), "stages": [], "pages": []}
+    with tempfile.TemporaryDirectory() as tmp:
+        for scale in args.scales:
+            print(f"Pipeline stages at x{scale}:")
+            report["stages"] += bench_scale(scale, scaled_csv(scale, tmp), args, bundle)
+
+    if not args.skip_pages:
+        print("Page runs (AppTest):")
+        report["pages"] = bench_pages(args)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+        print(f"\nWrote {args.output}")
+    if args.compare:
+        compare(report, args.compare)
+
+
+if __name__ == "__main__":
+    main()
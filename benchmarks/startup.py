@@ -0,0 +1,95 @@
+"""Startup-time report: first render of each page in a fresh process.
+
+Every measurement runs in a new interpreter, so it includes the imports,
+the dataset and model loads and anything else the page pays for on first
+use. Two scenarios are reported:
+
+* ``cold``: the page is the first thing the process renders (warm-up off).
+* ``warmed``: the home page is rendered first and its background warm-up
+  is allowed to finish, as when a user lands on the home page.
+
+``--root`` points at another checkout so the same report can be produced
+for an older commit (``git worktree add /tmp/before <rev>``); the
+``warmed`` scenario is skipped for trees without ``utils/warmup.py``.
+
+    python -m benchmarks.startup --repeat 3 --output startup.json
+    python -m benchmarks.startup --root /tmp/before
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+PAGES = [
+    "streamlit_app.py",
+    "pages/1_Data_Explorer.py",
+    "pages/2_Feature_Relationships.py",
+    "pages/3_Price_Predictor.py",
+    "pages/4_Explainability.py",
+]
+
+# Runs inside the child interpreter; prints one JSON line
+CHILD = r"""
+import json, os, sys, time, warnings
+warnings.filterwarnings("ignore")
+sys.path.insert(0, {root!r})
+os.chdir({root!r})
+from streamlit.testing.v1 import AppTest
+
+def run(page):
+    start = time.perf_counter()
+    at = AppTest.from_file(os.path.join({root!r}, page), default_timeout=900).run()
+    return time.perf_counter() - start, [str(e.value) for e in at.exception]
+
+result = {{}}
+if {warmed!r}:
+    from utils import warmup
+    result["home_seconds"], _ = run("streamlit_app.py")
+    start = time.perf_counter()
+    warmup.wait()
+    result["warmup_seconds"] = result["home_seconds"] + time.perf_counter() - start
+    result["warmup_errors"] = warmup.status()["errors"]
+result["seconds"], result["exceptions"] = run({page!r})
+print(json.dumps(result))
+"""
+
+
+def measure(root, page, warmed):
+    env = dict(os.environ, CARPRICE_WARMUP="1" if warmed else "0")
+    code = CHILD.format(root=str(root), page=page, warmed=warmed)
+    out = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True, env=env)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--root", type=Path, default=ROOT, help="checkout to measure")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    root = args.root.resolve()
+    scenarios = ["cold"] + (["warmed"] if (root / "utils" / "warmup.py").exists() else [])
+    measure(root, PAGES[-1], warmed=False)  # build the on-disk caches first
+
+    results = []
+    for page in PAGES:
+        for scenario in scenarios:
+            runs = [measure(root, page, scenario == "warmed") for _ in range(args.repeat)]
+            best = min(runs, key=lambda r: r["seconds"])
+            results.append({"page": page, "scenario": scenario, **best})
+            extra = f"  (warm-up {best['warmup_seconds']:.2f} s)" if "warmup_seconds" in best else ""
+            print(f"{page:<34} {scenario:<7} {best['seconds']:7.2f} s{extra}")
+            if best["exceptions"]:
+                print(f"    exceptions: {best['exceptions']}")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps({"root": str(root), "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
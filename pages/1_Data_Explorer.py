@@ -1,13 +1,19 @@
+import math
+
 import streamlit as st
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
+
+from utils.cube import PriceCube, get_cube
+from utils.data import load_dataset
+from utils.distributions import DistributionSummary, get_summary
+from utils.figures import show
+from utils.instrumentation import begin_run, diagnostics_panel, stage
+from utils.row_index import get_row_index, take
 
 # ========================================
 # GLOBAL CONFIG & STYLE
 # ========================================
 st.set_page_config(layout="wide")
-sns.set_style("whitegrid")
+begin_run("Data Explorer")
 
 st.markdown("""
 <style>
@@ -41,29 +47,44 @@ st.title("📊 Data Overview")
 # ========================================
 # DATA IMPORT & CLEANING
 # ========================================
-df = pd.read_csv("car_ad_display.csv", encoding="ISO-8859-1", sep=";").drop(columns='Unnamed: 0')
-df = df.dropna()
-
-df_raw = df.copy()   
-
-def shorten_categories(categories, cutoff):
-    mapping = {}
-    for i in range(len(categories)):
-        mapping[categories.index[i]] = (
-            categories.index[i] if categories.values[i] >= cutoff else "Other"
-        )
-    return mapping
+data = load_dataset()
 
-df['car'] = df['car'].map(shorten_categories(df['car'].value_counts(), 10))
-df['model'] = df['model'].map(shorten_categories(df['model'].value_counts(), 10))
-
-initial_rows = df.shape[0]
-
-# Filters 
-df = df[(df["price"] <= 100000) & (df["price"] >= 1000)]
-df = df[(df["mileage"] <= 600) & (df["engV"] <= 7.5)]
-df = df[df["year"] >= 1975]
+df_raw = data.complete
+df = data.clean
+fingerprint = data.fingerprint
 
+# ========================================
+# SIDEBAR FILTERS
+# ========================================
+# Resolved through per-category posting lists and sorted numeric indexes, so
+# a filter change costs time in proportion to the rows it selects.
+row_index, clean_position = get_row_index(data)
+
+st.sidebar.header("Filters")
+brands = st.sidebar.multiselect("Brand", row_index.labels("car"))
+bodies = st.sidebar.multiselect("Body type", row_index.labels("body"))
+year_bounds = row_index.bounds("year")
+years = st.sidebar.slider("Year", *year_bounds, value=year_bounds)
+price_low, price_high = row_index.bounds("price")
+price_bounds = (math.floor(price_low), math.ceil(price_high))
+prices = st.sidebar.slider("Price", *price_bounds, value=price_bounds)
+
+with stage("filter"):
+    rows = row_index.select({"car": brands, "body": bodies}, {"year": years, "price": prices})
+    if rows is None:
+        view = fingerprint
+    else:
+        view = (fingerprint, tuple(brands), tuple(bodies), years, prices)
+        kept = clean_position[rows]
+        df_raw = take(df_raw, rows)
+        df = take(df, kept[kept >= 0])
+
+if len(df) == 0:
+    st.warning("No cleaned listings match the current filters.")
+    diagnostics_panel()
+    st.stop()
+
+initial_rows = df_raw.shape[0]
 cleaned_rows = df.shape[0]
 
 # ========================================
@@ -116,14 +137,20 @@ with tab2:
 
     numeric_cols = ["price", "mileage", "engV", "year"]
 
+    # Drawn from precomputed bin counts and an FFT-binned KDE, not the raw column
+    def draw_histogram(plt, sns, feature):
+        fig, ax = plt.subplots(figsize=(4.2, 2.7))
+        summary = get_summary(data, feature) if rows is None else DistributionSummary(df[feature].to_numpy())
+        summary.plot(ax)
+        ax.set_xlabel(feature)
+        ax.set_title(feature.capitalize(), fontsize=11)
+        return fig
+
     for i in range(0, len(numeric_cols), 2):
         cols = st.columns(2)
         for col, feature in zip(cols, numeric_cols[i:i+2]):
             with col:
-                fig, ax = plt.subplots(figsize=(4.2, 2.7))
-                sns.histplot(df[feature], kde=True, bins=35, ax=ax)
-                ax.set_title(feature.capitalize(), fontsize=11)
-                st.pyplot(fig)
+                show((view, "histogram", feature), lambda plt, sns: draw_histogram(plt, sns, feature))
 
     st.markdown("""
     <div class='subheader-q'>💡 Insights</div>
@@ -144,15 +171,18 @@ with tab3:
 
     cat_cols = ["body", "engType", "drive", "registration"]
 
+    def draw_countplot(plt, sns, cat):
+        fig, ax = plt.subplots(figsize=(4.2, 2.4))
+        sns.countplot(x=cat, data=df, ax=ax)
+        ax.set_title(cat.capitalize(), fontsize=11)
+        plt.xticks(rotation=35)
+        return fig
+
     for i in range(0, len(cat_cols), 2):
         cols = st.columns(2)
         for col, cat in zip(cols, cat_cols[i:i+2]):
             with col:
-                fig, ax = plt.subplots(figsize=(4.2, 2.4))
-                sns.countplot(x=cat, data=df, ax=ax)
-                ax.set_title(cat.capitalize(), fontsize=11)
-                plt.xticks(rotation=35)
-                st.pyplot(fig)
+                show((view, "countplot", cat), lambda plt, sns: draw_countplot(plt, sns, cat))
 
     st.markdown("""
     <div class='subheader-q'>💡 Insights</div>
@@ -169,23 +199,21 @@ with tab3:
 with tab4:
     st.header("💰 Top 10 Most Expensive Cars")
 
-    
-    df_top10 = df_raw.copy().dropna()
+    # Most expensive listing per car/model, read from the aggregate cube
+    raw_cube = get_cube(data, "complete") if rows is None else PriceCube.from_frame(df_raw)
+    top_10 = df_raw.loc[raw_cube.top(10, by=["car", "model"])["row"]]
 
-    top_10 = (
-        df_top10.sort_values(by="price", ascending=False)
-        .drop_duplicates(subset=["car", "model"])
-        .head(10)
-    )
+    top_10["label"] = top_10["car"].astype(str) + " " + top_10["model"].astype(str)
 
-    top_10["label"] = top_10["car"] + " " + top_10["model"]
+    def draw_top10(plt, sns):
+        fig, ax = plt.subplots(figsize=(9, 4))
+        sns.barplot(data=top_10, x="label", y="price", palette="viridis", ax=ax)
+        plt.xticks(rotation=35, ha="right")
+        ax.set_title("Top 10 Most Expensive Cars (Notebook Identical)", fontsize=14)
+        plt.tight_layout(pad=0.5)
+        return fig
 
-    fig, ax = plt.subplots(figsize=(9, 4))
-    sns.barplot(data=top_10, x="label", y="price", palette="viridis", ax=ax)
-    plt.xticks(rotation=35, ha="right")
-    ax.set_title("Top 10 Most Expensive Cars (Notebook Identical)", fontsize=14)
-    plt.tight_layout(pad=0.5)
-    st.pyplot(fig)
+    show((view, "top10_cars"), draw_top10)
 
     st.subheader("Detailed Prices of Top 10 Cars")
     st.dataframe(top_10, height=320)
@@ -204,14 +232,18 @@ with tab4:
     # ------------------------------------------------------------
     st.subheader("💵 Top 10 Most Expensive Brands (Mean Price)")
 
-    mean_price = df.groupby("car")["price"].mean().sort_values(ascending=False).head(10)
+    clean_cube = get_cube(data) if rows is None else PriceCube.from_frame(df)
+    mean_price = clean_cube.mean("car").sort_values(ascending=False).head(10)
 
-    fig2, ax2 = plt.subplots(figsize=(9, 4))
-    sns.barplot(x=mean_price.index, y=mean_price.values, palette="magma", ax=ax2)
-    plt.xticks(rotation=35)
-    ax2.set_title("Top 10 Brands by Average Price", fontsize=12)
-    plt.tight_layout(pad=0.5)
-    st.pyplot(fig2)
+    def draw_top10_brands(plt, sns):
+        fig2, ax2 = plt.subplots(figsize=(9, 4))
+        sns.barplot(x=mean_price.index, y=mean_price.values, palette="magma", ax=ax2)
+        plt.xticks(rotation=35)
+        ax2.set_title("Top 10 Brands by Average Price", fontsize=12)
+        plt.tight_layout(pad=0.5)
+        return fig2
+
+    show((view, "top10_brands"), draw_top10_brands)
 
     st.write(mean_price)
 
@@ -239,7 +271,7 @@ with tab5:
     
     col_center = st.columns([2, 1, 2])[1]
 
-    with col_center:
+    def draw_cleaning_pie(plt, sns):
         fig, ax = plt.subplots(figsize=(6.0, 6.0))
         ax.pie(
             [cleaned_rows, initial_rows - cleaned_rows],
@@ -250,7 +282,10 @@ with tab5:
         )
         ax.set_title("", fontsize=1)
         plt.tight_layout(pad=0)
-        st.pyplot(fig)
+        return fig
+
+    with col_center:
+        show((view, "cleaning_pie"), draw_cleaning_pie)
 
     st.markdown("""
     <div class='subheader-q'>💡 Insights</div>
@@ -260,3 +295,6 @@ with tab5:
     • The resulting dataset is clean and suitable for statistical modeling.
     </div>
     """, unsafe_allow_html=True)
+
+
+diagnostics_panel()
@@ -1,14 +1,18 @@
 import streamlit as st
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-from sklearn.preprocessing import LabelEncoder
+
+from utils.binning import bin_edges, density_grid, plot_density
+from utils.correlation import get_correlation
+from utils.cube import get_cube
+from utils.data import load_dataset
+from utils.figures import show
+from utils.instrumentation import begin_run, diagnostics_panel
+from utils.model_registry import get_model
 
 # ========================================
 # GLOBAL PAGE STYLE 
 # ========================================
 st.set_page_config(layout="wide")
-sns.set_style("whitegrid")
+begin_run("Feature Relationships")
 
 st.markdown("""
 <style>
@@ -38,33 +42,15 @@ h1, h2, h3 {font-family: 'Georgia', serif;}
 
 st.title("📈 Feature Relationships with Price")
 
+RAW_POINT_LIMIT = 50_000
+
 # ========================================
 # DATA PIPELINE 
 # ========================================
 
-df = pd.read_csv("car_ad_display.csv", encoding="ISO-8859-1", sep=";").drop(columns='Unnamed: 0')
-df = df.dropna()
-
-def shorten_categories(categories, cutoff):
-    categorical_map = {}
-    for i in range(len(categories)):
-        if categories.values[i] >= cutoff:
-            categorical_map[categories.index[i]] = categories.index[i]
-        else:
-            categorical_map[categories.index[i]] = 'Other'
-    return categorical_map
-
-car_map = shorten_categories(df.car.value_counts(), 10)
-df['car'] = df['car'].map(car_map)
-
-model_map = shorten_categories(df.model.value_counts(), 10)
-df['model'] = df['model'].map(model_map)
-
-df = df[df["price"] <= 100000]
-df = df[df["price"] >= 1000]
-df = df[df["mileage"] <= 600]
-df = df[df["engV"] <= 7.5]
-df = df[df["year"] >= 1975]
+dataset = load_dataset()
+df = dataset.clean
+fingerprint = dataset.fingerprint
 
 # ========================================
 # TABS
@@ -83,15 +69,43 @@ with tab_num:
     st.markdown("<div class='subheader-q'>How do continuous variables influence vehicle price?</div>", unsafe_allow_html=True)
 
     numeric_features = ["mileage", "engV", "year"]
+
+    # Density grids keep render time and image size flat however many listings
+    # there are; individual points are only offered for small datasets.
+    raw_points = st.toggle(
+        "Plot individual listings",
+        value=False,
+        disabled=len(df) > RAW_POINT_LIMIT,
+        help=f"Available up to {RAW_POINT_LIMIT:,} listings; larger datasets are always binned.",
+    ) and len(df) <= RAW_POINT_LIMIT
+
     cols = st.columns(3)
 
+    def draw_scatter(plt, sns, feat):
+        fig, ax = plt.subplots(figsize=(4.3, 3))
+        sns.scatterplot(data=df, x=feat, y="price", alpha=0.25, ax=ax)
+        ax.set_title(f"{feat.capitalize()} vs Price", fontsize=11)
+        plt.tight_layout()
+        return fig
+
+    def draw_density(plt, sns, feat):
+        x_edges, y_edges = bin_edges(df[feat].to_numpy()), bin_edges(df["price"].to_numpy())
+        counts = density_grid(df[feat], df["price"], x_edges, y_edges)
+        fig, ax = plt.subplots(figsize=(4.3, 3))
+        mesh = plot_density(ax, counts, x_edges, y_edges)
+        fig.colorbar(mesh, ax=ax, label="listings")
+        ax.set_xlabel(feat)
+        ax.set_ylabel("price")
+        ax.set_title(f"{feat.capitalize()} vs Price", fontsize=11)
+        plt.tight_layout()
+        return fig
+
     for col, feat in zip(cols, numeric_features):
         with col:
-            fig, ax = plt.subplots(figsize=(4.3, 3))
-            sns.scatterplot(data=df, x=feat, y="price", alpha=0.25, ax=ax)
-            ax.set_title(f"{feat.capitalize()} vs Price", fontsize=11)
-            plt.tight_layout()
-            st.pyplot(fig)
+            if raw_points:
+                show((fingerprint, "scatter", feat), lambda plt, sns: draw_scatter(plt, sns, feat))
+            else:
+                show((fingerprint, "density", feat), lambda plt, sns: draw_density(plt, sns, feat))
 
     st.markdown("""
     <div class='subheader-q'>💡 Insights</div>
@@ -112,16 +126,32 @@ with tab_cat:
 
     cat_features = ["body", "engType", "drive", "registration"]
 
+    def draw_boxplot(plt, sns, feat):
+        # Quartiles and whiskers come from the cube's price sketches
+        fig, ax = plt.subplots(figsize=(4.8, 3))
+        line = {"color": "#3f3f3f"}
+        ax.bxp(
+            get_cube(dataset).box_stats(feat),
+            widths=0.8,
+            patch_artist=True,
+            boxprops={"facecolor": sns.desaturate("C0", 0.75), "edgecolor": "#3f3f3f"},
+            whiskerprops=line,
+            capprops=line,
+            medianprops=line,
+            flierprops={"markerfacecolor": "none", "markeredgecolor": "#3f3f3f"},
+        )
+        ax.set_xlabel(feat)
+        ax.set_ylabel("price")
+        plt.xticks(rotation=35)
+        plt.tight_layout()
+        return fig
+
     for i in range(0, len(cat_features), 2):
         cols = st.columns(2)
         for col, feat in zip(cols, cat_features[i:i+2]):
             with col:
                 st.markdown(f"#### {feat.capitalize()}")
-                fig, ax = plt.subplots(figsize=(4.8, 3))
-                sns.boxplot(data=df, x=feat, y="price", ax=ax)
-                plt.xticks(rotation=35)
-                plt.tight_layout()
-                st.pyplot(fig)
+                show((fingerprint, "boxplot", feat), lambda plt, sns: draw_boxplot(plt, sns, feat))
 
     st.markdown("""
 <div class='subheader-q'>💡 Insights</div>
@@ -143,24 +173,16 @@ with tab_corr:
     st.markdown("<div class='section-title'>3. Correlation Matrix</div>", unsafe_allow_html=True)
     st.markdown("<div class='subheader-q'>Which variables are most linearly correlated with price?</div>", unsafe_allow_html=True)
 
-    df_corr = df.copy()
-    df_corr = df_corr.drop(columns=["model"])   
-
-    for col in ["car", "body", "engType", "drive"]:
-        le = LabelEncoder()
-        df_corr[col] = le.fit_transform(df_corr[col])
+    # Streamed over the cleaned data with the model's encoding and persisted on disk
+    corr = get_correlation(dataset, get_model())
 
-    df_corr["registration"] = df_corr["registration"].map(
-        {"yes": 1, "YES": 1, "Yes": 1, "y": 1, "Y": 1,
-         "no": 0, "No": 0, "NO": 0}
-    )
+    def draw_heatmap(plt, sns):
+        fig, ax = plt.subplots(figsize=(8, 6))
+        sns.heatmap(corr, vmin=-1, vmax=1, cmap="icefire", annot=False, ax=ax)
+        ax.set_title("Correlation Heatmap", fontsize=13)
+        return fig
 
-    corr = df_corr.corr()
-
-    fig, ax = plt.subplots(figsize=(8, 6))
-    sns.heatmap(corr, vmin=-1, vmax=1, cmap="icefire", annot=False, ax=ax)
-    ax.set_title("Correlation Heatmap", fontsize=13)
-    st.pyplot(fig)
+    show((fingerprint, get_model().content_hash, "correlation_heatmap"), draw_heatmap)
 
     st.markdown("""
     <div class='subheader-q'>💡 Insights</div>
@@ -172,3 +194,6 @@ with tab_corr:
     • Overall, numeric variables dominate linear predictive power.
     </div>
     """, unsafe_allow_html=True)
+
+
+diagnostics_panel()
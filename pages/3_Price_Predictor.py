@@ -1,7 +1,16 @@
 
 import streamlit as st
-import pandas as pd
-import pickle
+
+from utils.data import load_dataset
+from utils.encoding import FEATURES
+from utils.figures import show
+from utils.instrumentation import begin_run, diagnostics_panel, stage
+from utils.model_registry import get_model, registry_stats
+from utils.prediction_cache import prediction_cache
+from utils.predict import predict_upload
+from utils.sensitivity import sweep
+
+begin_run("Price Predictor")
 
 
 # ===== PRICE PREDICTOR HEADER =====
@@ -23,18 +32,12 @@ st.markdown("""
 </div>
 <br>
 """, unsafe_allow_html=True)
-# Load model + encoders
-with open("model.pkl", "rb") as f:
-    data = pickle.load(f)
-
-model = data["model"]
-le_car = data["le_car"]
-le_body = data["le_body"]
-le_engType = data["le_engType"]
-le_drive = data["le_drive"]
+# Load model + encoder
+bundle = get_model()
+encoder = bundle.encoder
 
 # Load dataset for options
-df_original = pd.read_csv("car_ad_display.csv", encoding="ISO-8859-1", sep=";").drop(columns='Unnamed: 0')
+df_original = load_dataset().raw
 
 st.subheader("Input Car Features")
 
@@ -47,20 +50,91 @@ reg = st.selectbox("Registered?", ["yes", "no"])
 year = st.slider("Car Year", min_value=1975, max_value=2023, value=2010)
 drive = st.selectbox("Drive Type", df_original['drive'].unique())
 
+
+def draw_sensitivity(plt, sns, curves, row, price):
+    fig, axes = plt.subplots(2, 2, figsize=(9, 6))
+    for ax, (col, curve) in zip(axes.flat, curves.items()):
+        current = row[FEATURES.index(col)]
+        if col in encoder.vocabularies:
+            labels = curve.index.astype(str)
+            colors = ["#3c7edb" if code == current else "#b8c7de" for code in range(len(curve))]
+            ax.bar(labels, curve.to_numpy(), color=colors)
+            ax.tick_params(axis="x", rotation=30)
+        else:
+            ax.plot(curve.index, curve.to_numpy(), color="#3c7edb")
+            ax.scatter([current], [price], color="#d62728", zorder=3)
+        ax.axhline(price, color="#444", linestyle="--", linewidth=0.8)
+        ax.set_xlabel(col)
+        ax.set_ylabel("price")
+        ax.set_title(f"Price vs {col}", fontsize=11)
+    plt.tight_layout()
+    return fig
+
+
 if st.button("Predict Price"):
-    try:
-        X_sample = [[
-            le_car.transform([brand])[0],
-            le_body.transform([body])[0],
-            mileage,
-            engV,
-            le_engType.transform([engType])[0],
-            1 if reg == "yes" else 0,
-            year,
-            le_drive.transform([drive])[0]
-        ]]
-
-        pred = model.predict(X_sample)[0]
+    # Unseen brands, bodies and engine types are encoded as "Other"
+    with stage("encode"):
+        X_sample = encoder.transform_row({
+            "car": brand, "body": body, "mileage": mileage, "engV": engV,
+            "engType": engType, "registration": reg, "year": year, "drive": drive,
+        })
+
+    if X_sample is None:
+        st.error("This car configuration includes unseen labels not present during training.")
+    else:
+        pred = prediction_cache.predict(bundle, X_sample)
         st.success(f"Estimated Price: **${pred:,.2f}**")
-    except:
-        st.error("This car configuration includes unseen labels not present during training.")
\ No newline at end of file
+
+        # What-if curves: the whole sweep grid is priced in one batched call
+        st.subheader("What-if Sensitivity")
+        st.caption("How the estimate for this car moves as one feature changes while the others stay as "
+                   "selected. The dashed line is the current estimate.")
+        curves = sweep(bundle, X_sample)
+        show((bundle.content_hash, "sensitivity", tuple(X_sample)),
+             lambda plt, sns: draw_sensitivity(plt, sns, curves, X_sample, pred))
+
+# ===== BATCH PREDICTION =====
+st.subheader("Batch Prediction")
+st.markdown("""
+Upload a CSV with the columns <code>car, body, mileage, engV, engType, registration, year, drive</code>
+(separated by <code>;</code> or <code>,</code>) to price a whole inventory at once.
+Unseen brands, body and engine types are priced as "Other"; rows that still cannot be encoded
+are flagged in the <code>error</code> column instead of stopping the batch.
+""", unsafe_allow_html=True)
+
+uploaded = st.file_uploader("Listings CSV", type="csv")
+if uploaded is not None:
+    # Priced once per file and model; reruns (e.g. the download click) reuse it
+    progress = st.empty()
+    try:
+        missing, result = predict_upload(
+            uploaded.getvalue(), bundle, progress=lambda done: progress.progress(done, text="Pricing listings..."))
+    except ValueError as exc:
+        missing, result = [], None
+        st.error(f"Could not read the uploaded file: {exc}")
+    progress.empty()
+    if missing:
+        st.error(f"The uploaded file is missing these columns: {', '.join(missing)}")
+    elif result is not None:
+        flagged = int((result["error"] != "").sum())
+
+        c1, c2 = st.columns(2)
+        c1.metric("Priced Rows", len(result) - flagged)
+        c2.metric("Flagged Rows", flagged)
+        st.dataframe(result.head(100), height=280)
+
+        st.download_button(
+            "Download Predictions",
+            result.to_csv(index=False).encode("utf-8"),
+            file_name="predicted_prices.csv",
+            mime="text/csv",
+        )
+
+# ===== DEBUG =====
+with st.expander("🛠 Debug"):
+    st.markdown("**Prediction cache** (shared by all sessions)")
+    st.json(prediction_cache.stats())
+    st.markdown("**Model registry**")
+    st.json(registry_stats())
+
+diagnostics_panel()
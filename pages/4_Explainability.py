@@ -1,16 +1,18 @@
 import streamlit as st
-import pandas as pd
-import numpy as np
-import pickle
-import shap
-import matplotlib.pyplot as plt
-import streamlit.components.v1 as components
+
+from utils.data import load_dataset, load_encoded
+from utils.figures import show
+from utils.instrumentation import begin_run, diagnostics_panel
+from utils.model_registry import get_model
+from utils.sampling import mean_abs_shap, strata, stratified_sample
+from utils.shap_cache import explain_rows, get_shap_values, is_cached
 
 
 # =======================================
 # PAGE CONFIG
 # =======================================
 st.set_page_config(layout="wide")
+begin_run("Explainability")
 st.title("🔍 Model Explainability (SHAP)")
 
 st.markdown("""
@@ -26,64 +28,78 @@ Below you will find:
 
 
 # =======================================
-# LOAD MODEL + ENCODERS
+# LOAD MODEL
 # =======================================
-with open("model.pkl", "rb") as f:
-    data = pickle.load(f)
-
-model = data["model"]
-le_car = data["le_car"]
-le_body = data["le_body"]
-le_engType = data["le_engType"]
-le_drive = data["le_drive"]
+bundle = get_model()
+model = bundle.model
 
 
 # =======================================
 # LOAD + CLEAN DATA
 # =======================================
-df = pd.read_csv("car_ad_display.csv", encoding="ISO-8859-1", sep=";").drop(columns='Unnamed: 0')
-df = df.dropna()
+dataset = load_dataset()
+X = load_encoded()
+
+
+# =======================================
+# COMPUTE SHAP VALUES
+# =======================================
+# Global values are computed once per (model, dataset) pair, on request, and
+# read back from the disk cache; the local tab only explains the selected row.
+def global_shap_values():
+    return get_shap_values(model, X, bundle.content_hash, dataset.fingerprint).explanation()
 
-def shorten_categories(categories, cutoff):
-    categorical_map = {}
-    for i in range(len(categories)):
-        if categories.values[i] >= cutoff:
-            categorical_map[categories.index[i]] = categories.index[i]
-        else:
-            categorical_map[categories.index[i]] = 'Other'
-    return categorical_map
 
-df['car'] = df['car'].map(shorten_categories(df.car.value_counts(), 10))
-df['model'] = df['model'].map(shorten_categories(df.model.value_counts(), 10))
+# =======================================
+# PLOTS
+# =======================================
+# Drawn through the shared chart cache; shap draws into the current figure
+plot_key = (bundle.content_hash, dataset.fingerprint)
 
-df = df[(df["price"] <= 100000) & (df["price"] >= 1000)]
-df = df[(df["mileage"] <= 600) & (df["engV"] <= 7.5)]
-df = df[df["year"] >= 1975]
 
-yes_l = ['yes', 'YES', 'Yes', 'y', 'Y']
-df['registration'] = np.where(df['registration'].isin(yes_l), 1, 0)
+def draw_summary(plt, shap, values, features):
+    plt.figure(figsize=(8, 5))
+    shap.summary_plot(values, features, show=False)
+    return plt.gcf()
 
-df = df.drop(columns='model')
 
-df['car'] = le_car.transform(df['car'])
-df['body'] = le_body.transform(df['body'])
-df['engType'] = le_engType.transform(df['engType'])
-df['drive'] = le_drive.transform(df['drive'])
+def draw_importance(plt, importance):
+    fig, ax = plt.subplots(figsize=(6, 4))
+    ordered = importance.iloc[::-1]
+    ax.barh(ordered.index, ordered["mean_abs"], xerr=1.96 * ordered["std_error"],
+            color="#1e88e5", ecolor="#333333", capsize=3)
+    ax.set_xlabel("mean(|SHAP value|)")
+    return fig
 
-X = df.drop(columns="price")
 
+def draw_waterfall(plt, shap, local):
+    plt.figure(figsize=(7, 5))
+    shap.plots.waterfall(local, show=False)
+    return plt.gcf()
 
-# =======================================
-# COMPUTE SHAP VALUES
-# =======================================
 
-explainer = shap.TreeExplainer(model)
-shap_values = explainer(X)
+def draw_force(plt, shap, local, features):
+    # force_plot creates its own figure
+    shap.force_plot(local.base_values, local.values, features, matplotlib=True, show=False)
+    return plt.gcf()
+
+
+def draw_decision(plt, shap, local, features):
+    plt.figure(figsize=(8, 4))
+    shap.decision_plot(local.base_values, local.values, features, show=False)
+    return plt.gcf()
+
+
+def draw_dependence(plt, shap, feature, interaction):
+    shap.dependence_plot(feature, global_shap_values().values, X, interaction_index=interaction, show=False)
+    return plt.gcf()
 
 
 # =======================================
 # TABS
 # =======================================
+# shap is imported inside the tabs, after the header is on screen; the
+# home page's warm-up has usually imported it already.
 tab1, tab2, tab3 = st.tabs([
     "🌈 Global Explainability",
     "📌 Local Explainability",
@@ -97,19 +113,46 @@ tab1, tab2, tab3 = st.tabs([
 with tab1:
     st.header("🌈 Global Feature Impact")
 
-    colA, colB = st.columns([1.3, 1])
-
-    with colA:
-        st.subheader("SHAP Summary Plot")
-        fig1 = plt.figure(figsize=(8, 5))
-        shap.summary_plot(shap_values, X, show=False)
-        st.pyplot(fig1)
-
-    with colB:
-        st.subheader("Mean Absolute SHAP Values")
-        fig2 = plt.figure(figsize=(6, 4))
-        shap.plots.bar(shap_values, show=False)
-        st.pyplot(fig2)
+    # The full TreeSHAP pass takes seconds on a cold cache, so it only runs on
+    # request; values the warm-up or an earlier run already cached are shown directly.
+    if not st.toggle(
+        "Compute global SHAP values",
+        value=is_cached(bundle.content_hash, dataset.fingerprint),
+        help="The first run explains every row; later runs read the values from the disk cache.",
+    ):
+        st.info("Turn on the toggle above to compute the global explanations.")
+    else:
+        import shap
+
+        shap_values = global_shap_values()
+
+        # Plots are drawn from a sample stratified by brand and price decile;
+        # raising the budget trades render time for accuracy.
+        budget = len(X)
+        if len(X) > 500:
+            budget = st.select_slider(
+                "Row budget",
+                options=[*range(500, len(X), 500), len(X)],
+                value=2_000 if len(X) > 2_000 else len(X),
+                format_func=lambda n: "All rows" if n == len(X) else f"{n:,}",
+                help="Rows drawn in the plots. All rows give exact mean |SHAP| values.",
+            )
+        row_strata = strata(dataset.clean)
+        rows = stratified_sample(row_strata, budget)
+        importance = mean_abs_shap(shap_values.values, row_strata, rows, X.columns)
+
+        colA, colB = st.columns([1.3, 1])
+
+        with colA:
+            st.subheader("SHAP Summary Plot")
+            show((*plot_key, "shap_summary", budget),
+                 lambda plt, sns: draw_summary(plt, shap, shap_values[rows], X.iloc[rows]))
+
+        with colB:
+            st.subheader("Mean Absolute SHAP Values")
+            show((*plot_key, "shap_importance", budget), lambda plt, sns: draw_importance(plt, importance))
+            st.caption(f"Estimated from {len(rows):,} of {len(X):,} rows; error bars are 95% intervals.")
+            st.dataframe(importance.round(1), height=180)
 
     st.markdown("""
     ### 🔍 **Insights**
@@ -131,39 +174,24 @@ with tab2:
     These plots explain exactly *how* the model combines the feature effects to produce its prediction.
     """)
 
+    import shap
+
     idx = st.number_input("Select an index to explain:", min_value=0, max_value=len(X)-1, value=0)
+    local = explain_rows(model, X, [idx], bundle.content_hash, dataset.fingerprint)[0]
 
     # -------- WATERFALL ----------
     st.subheader("📘 Waterfall Plot")
-    figW = plt.figure(figsize=(7, 5))
-    shap.plots.waterfall(shap_values[idx], show=False)
-    st.pyplot(figW)
+    show((*plot_key, "shap_waterfall", idx), lambda plt, sns: draw_waterfall(plt, shap, local))
 
 
     # -------- FORCE PLOT ----------
-    # Force plot
     st.subheader("🟩 Force Plot")
-
-    figF = plt.figure(figsize=(9, 3))
-    shap.force_plot(
-    shap_values[idx].base_values,
-    shap_values[idx].values,
-    X.iloc[idx],
-    matplotlib=True,
-    show=False)
-    st.pyplot(figF)
+    show((*plot_key, "shap_force", idx), lambda plt, sns: draw_force(plt, shap, local, X.iloc[idx]))
 
 
     # -------- DECISION PLOT ----------
     st.subheader("📙 Decision Plot")
-    figD = plt.figure(figsize=(8, 4))
-    shap.decision_plot(
-        shap_values[idx].base_values,
-        shap_values[idx].values,
-        X.iloc[idx],
-        show=False
-    )
-    st.pyplot(figD)
+    show((*plot_key, "shap_decision", idx), lambda plt, sns: draw_decision(plt, shap, local, X.iloc[idx]))
 
 
     st.markdown("""
@@ -191,23 +219,15 @@ with tab3:
     # Avoid same feature for both axes
     if feature == interaction:
         st.warning("Interaction feature must be different from the selected feature.")
+        diagnostics_panel()
         st.stop()
 
     # Draw plot AFTER choices are made
     if st.button("Generate Dependence Plot"):
-        plt.clf()              # Clear previous SHAP fig
-        plt.close('all')       # Close hidden matplotlib handles
+        import shap
 
-        shap.dependence_plot(
-            feature,
-            shap_values.values,
-            X,
-            interaction_index=interaction,
-            show=False
-        )
-
-        figDP = plt.gcf()  
-        st.pyplot(figDP)
+        show((*plot_key, "shap_dependence", feature, interaction),
+             lambda plt, sns: draw_dependence(plt, shap, feature, interaction))
 
         st.markdown(f"### 🔍 **Insights**")
         st.markdown("""
@@ -218,3 +238,6 @@ with tab3:
         """)
     else:
         st.info("Select features and click the button to generate the dependence plot.")
+
+
+diagnostics_panel()
@@ -0,0 +1,150 @@
+"""Headless HTTP price prediction service.
+
+Serves the same model artifact and encoders as the Streamlit app, without the
+UI. Concurrent single-listing requests are coalesced into micro-batches before
+``model.predict`` is called.
+
+    python prediction_service.py --port 8000 --max-batch-size 64 --max-wait-ms 5
+
+Endpoints:
+    POST /predict   one listing (JSON object) or a list of listings
+    GET  /stats     latency percentiles, batch sizes and throughput
+    GET  /health    liveness check
+"""
+import argparse
+import json
+from concurrent.futures import TimeoutError
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+
+from utils.batching import MicroBatcher
+from utils.encoding import FEATURES
+from utils.model_registry import get_model
+from utils.predict import predict_batch
+
+REQUEST_TIMEOUT = 30
+SCALAR_TYPES = (str, int, float, bool, type(None))
+
+
+def listing_error(listing):
+    """Why ``listing`` is not a valid request item, or ``None`` if it is."""
+    if not isinstance(listing, dict):
+        return "expected a listing object"
+    unknown = sorted(set(listing) - set(FEATURES))
+    if unknown:
+        return f"unknown fields: {', '.join(map(str, unknown))}"
+    nested = [key for key, value in listing.items() if not isinstance(value, SCALAR_TYPES)]
+    if nested:
+        return f"fields must be strings or numbers: {', '.join(nested)}"
+    return None
+
+
+def predict_listings(listings):
+    """Micro-batch handler: price a list of listing dicts in one call.
+
+    If the batch as a whole fails, each listing is priced on its own so one
+    bad item only fails itself.
+    """
+    try:
+        return _price(listings)
+    except Exception:
+        results = []
+        for listing in listings:
+            try:
+                results.extend(_price([listing]))
+            except Exception as exc:
+                results.append({"error": f"prediction failed: {exc}"})
+        return results
+
+
+def _price(listings):
+    df = pd.DataFrame.from_records(listings, columns=FEATURES)
+    result = predict_batch(df, get_model())
+    return [
+        {"error": error} if error else {"predicted_price": float(price)}
+        for price, error in zip(result["predicted_price"], result["error"])
+    ]
+
+
+class PredictionServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256  # the default of 5 drops connections under load
+
+
+class PredictionHandler(BaseHTTPRequestHandler):
+    batcher = None
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send(200, {"status": "ok"})
+        elif self.path == "/stats":
+            self._send(200, self.batcher.stats())
+        else:
+            self._send(404, {"error": "not found"})
+
+    def do_POST(self):
+        if self.path != "/predict":
+            self._send(404, {"error": "not found"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            payload = json.loads(self.rfile.read(length))
+        except ValueError:
+            self._send(400, {"error": "request body must be JSON"})
+            return
+
+        listings = payload if isinstance(payload, list) else [payload]
+        for i, item in enumerate(listings):
+            error = listing_error(item)
+            if error:
+                prefix = f"listing {i}: " if isinstance(payload, list) else ""
+                self._send(400, {"error": prefix + error})
+                return
+        futures = [self.batcher.submit(item) for item in listings]
+        try:
+            results = [future.result(timeout=REQUEST_TIMEOUT) for future in futures]
+        except TimeoutError:
+            self._send(500, {"error": "prediction timed out"})
+            return
+        except Exception as exc:
+            self._send(500, {"error": f"prediction failed: {exc}"})
+            return
+        self._send(200, results if isinstance(payload, list) else results[0])
+
+    def _send(self, status, body):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass  # per-request logging would dominate latency under load
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless car price prediction service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--max-batch-size", type=int, default=64)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    args = parser.parse_args(argv)
+
+    # The bundle parses its components lazily; do it before accepting traffic
+    get_model().load_all()
+    PredictionHandler.batcher = MicroBatcher(predict_listings, args.max_batch_size, args.max_wait_ms)
+    server = PredictionServer((args.host, args.port), PredictionHandler)
+    print(f"Serving predictions on http://{args.host}:{args.port} "
+          f"(max batch {args.max_batch_size}, max wait {args.max_wait_ms} ms)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
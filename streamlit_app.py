@@ -1,8 +1,14 @@
 import streamlit as st
 
+from utils import warmup
+
 # Streamlit page setup
 st.set_page_config(page_title="Car Price Prediction App", layout="wide")
 
+# Load libraries, data, model and SHAP values in the background while the
+# user reads the home page
+warmup.start()
+
 # ======================
 # INTRO SECTION 
 # ======================
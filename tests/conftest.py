@@ -0,0 +1,9 @@
+"""Fixtures shared by the test modules."""
+import pytest
+
+
+@pytest.fixture
+def listing():
+    """One valid listing, as the Price Predictor and the service receive it."""
+    return {"car": "Toyota", "body": "sedan", "mileage": 120, "engV": 2.0,
+            "engType": "Petrol", "registration": "yes", "year": 2008, "drive": "front"}
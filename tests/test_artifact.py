@@ -0,0 +1,54 @@
+"""Model artifact export, verification and the manifest content hash."""
+import json
+
+import numpy as np
+import pytest
+
+from utils import artifact, data
+from utils.model_registry import MODEL_PATH, get_model
+
+
+@pytest.fixture
+def exported(tmp_path):
+    bundle = get_model()
+    directory = tmp_path / "model"
+    artifact.export(bundle.model, bundle.encoder, directory)
+    return directory
+
+
+def test_round_trip_reproduces_model_and_hash(exported):
+    bundle = get_model()
+    manifest = artifact.read_manifest(exported)
+    assert manifest["content_hash"] == artifact.read_manifest(MODEL_PATH)["content_hash"]
+
+    X = data.load_encoded()
+    model = artifact.load_model(exported, manifest)
+    np.testing.assert_array_equal(model.predict(X), bundle.model.predict(X))
+    assert artifact.load_encoder(exported, manifest).to_dict() == bundle.encoder.to_dict()
+
+
+def test_export_replaces_existing_artifact(exported):
+    bundle = get_model()
+    artifact.export(bundle.model, bundle.encoder, exported)
+    assert artifact.read_manifest(exported)["content_hash"] == bundle.content_hash
+    assert sorted(p.name for p in exported.parent.iterdir()) == ["model"]
+
+
+def test_tampered_component_is_rejected(exported):
+    manifest = artifact.read_manifest(exported)
+    with open(exported / artifact.ENCODER_FILE, "a", encoding="utf-8") as f:
+        f.write(" ")
+    with pytest.raises(ValueError, match="does not match the hash"):
+        artifact.load_encoder(exported, manifest)
+
+
+def test_manifest_hash_covers_files_and_features(exported):
+    path = exported / artifact.MANIFEST
+    manifest = json.loads(path.read_text(encoding="utf-8"))
+    manifest["files"][artifact.MODEL_FILE] = "0" * 64
+    path.write_text(json.dumps(manifest), encoding="utf-8")
+    with pytest.raises(ValueError, match="content hash"):
+        artifact.read_manifest(exported)
+
+    features = list(reversed(manifest["features"]))
+    assert artifact.content_hash(features, manifest["files"]) != manifest["content_hash"]
@@ -0,0 +1,70 @@
+"""Micro-batching and the prediction service's batch handler."""
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from prediction_service import listing_error, predict_listings
+from utils.batching import MicroBatcher
+from utils.encoding import FEATURES
+from utils.model_registry import get_model
+
+
+def test_concurrent_submits_are_coalesced_in_order():
+    calls = []
+    gate = threading.Event()
+
+    def handler(items):
+        gate.wait()
+        calls.append(list(items))
+        return [item * 2 for item in items]
+
+    batcher = MicroBatcher(handler, max_batch_size=8, max_wait_ms=50)
+    futures = [batcher.submit(i) for i in range(20)]
+    gate.set()
+    assert [f.result(timeout=5) for f in futures] == [i * 2 for i in range(20)]
+    assert [item for batch in calls for item in batch] == list(range(20))
+    assert max(len(batch) for batch in calls) == 8
+    assert batcher.stats()["requests"] == 20
+
+
+def test_handler_error_fails_the_batch_futures():
+    def handler(items):
+        raise RuntimeError("boom")
+
+    future = MicroBatcher(handler, max_wait_ms=1).submit(1)
+    with pytest.raises(RuntimeError, match="boom"):
+        future.result(timeout=5)
+
+
+def test_short_handler_result_fails_every_future():
+    batcher = MicroBatcher(lambda items: items[:-1], max_batch_size=4, max_wait_ms=50)
+    futures = [batcher.submit(i) for i in range(4)]
+    for future in futures:
+        with pytest.raises(RuntimeError, match="results for"):
+            future.result(timeout=5)
+
+
+def test_batched_prices_match_single_predictions(listing):
+    bundle = get_model()
+    listings = [{**listing, "year": year, "mileage": mileage}
+                for year, mileage in [(2001, 300), (2008, 120), (2015, 20)]]
+    expected = bundle.model.predict(pd.DataFrame(
+        [bundle.encoder.transform_row(listing) for listing in listings], columns=FEATURES))
+    prices = [result["predicted_price"] for result in predict_listings(listings)]
+    np.testing.assert_allclose(prices, expected)
+
+
+def test_bad_items_only_fail_themselves(listing):
+    results = predict_listings([listing, {**listing, "drive": "hover"}, {**listing, "year": "abc"}, listing])
+    assert "predicted_price" in results[0] and results[0] == results[3]
+    assert results[1] == {"error": "unseen drive"}
+    assert "error" in results[2]
+
+
+def test_listing_validation(listing):
+    assert listing_error(listing) is None
+    assert listing_error([listing]) == "expected a listing object"
+    assert listing_error({**listing, "colour": "red"}) == "unknown fields: colour"
+    assert listing_error({**listing, "year": [2008]}) == "fields must be strings or numbers: year"
@@ -0,0 +1,54 @@
+"""Density grids checked against np.histogram2d."""
+import warnings
+
+import numpy as np
+
+from utils.binning import GRID_BINS, bin_edges, density_grid
+
+
+def test_grid_equals_histogram2d():
+    rng = np.random.default_rng(3)
+    x = rng.lognormal(10, 1, 50_000)
+    y = rng.normal(0, 5, 50_000)
+    x_edges, y_edges = bin_edges(x), bin_edges(y)
+    assert len(x_edges) == len(y_edges) == GRID_BINS + 1
+    expected, _, _ = np.histogram2d(x, y, bins=[x_edges, y_edges])
+    counts = density_grid(x, y, x_edges, y_edges)
+    np.testing.assert_array_equal(counts, expected)
+    assert counts.sum() == len(x)
+
+
+def test_integer_columns_get_one_bin_per_value():
+    rng = np.random.default_rng(4)
+    year = rng.integers(1990, 2016, 10_000)
+    price = rng.uniform(500, 50_000, 10_000)
+    year_edges, price_edges = bin_edges(year), bin_edges(price)
+    np.testing.assert_array_equal(year_edges, np.arange(1990, 2017) - 0.5)
+    expected, _, _ = np.histogram2d(year, price, bins=[year_edges, price_edges])
+    np.testing.assert_array_equal(density_grid(year, price, year_edges, price_edges), expected)
+
+
+def test_points_outside_the_edges_are_dropped():
+    rng = np.random.default_rng(5)
+    x, y = rng.uniform(-1, 2, 5_000), rng.uniform(-1, 2, 5_000)
+    x[:10] = np.nan
+    edges = np.linspace(0, 1, 11)
+    uneven = np.array([0.0, 0.1, 0.5, 0.55, 1.0])
+    finite = ~np.isnan(x)
+    for y_edges in (edges, uneven):
+        expected, _, _ = np.histogram2d(x[finite], y[finite], bins=[edges, y_edges])
+        np.testing.assert_array_equal(density_grid(x, y, edges, y_edges), expected)
+
+
+def test_missing_values_are_dropped_without_warnings():
+    x = np.array([np.nan, 0.5, 1.0, np.nan, 0.0])
+    y = np.array([0.5, np.nan, 1.0, np.nan, 0.0])
+    edges = np.linspace(0, 1, 5)
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        counts = density_grid(x, y, edges, edges)
+    assert counts.sum() == 2 and counts[0, 0] == 1 and counts[-1, -1] == 1
+
+
+def test_constant_column_gets_a_unit_span():
+    np.testing.assert_array_equal(bin_edges(np.full(5, 3.0), bins=4), [3.0, 3.25, 3.5, 3.75, 4.0])
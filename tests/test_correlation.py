@@ -0,0 +1,37 @@
+"""Streaming correlation checked against ``DataFrame.corr``."""
+import numpy as np
+import pytest
+
+from utils import data
+from utils.correlation import COLUMNS, CorrelationAccumulator, accumulate
+from utils.model_registry import get_model
+
+
+@pytest.fixture(scope="module")
+def clean():
+    return data.clean(data.read_raw())
+
+
+def reference(clean, encoder):
+    return encoder.transform(clean).assign(price=clean["price"].to_numpy(dtype=np.float64))[COLUMNS].corr()
+
+
+def test_correlation_matches_dataframe_corr(clean):
+    encoder = get_model().encoder
+    expected = reference(clean, encoder)
+
+    chunks = [clean.iloc[start:start + 1000] for start in range(0, len(clean), 1000)]
+    streamed = accumulate(chunks, encoder).correlation()
+    merged = accumulate(chunks[::2], encoder).merge(accumulate(chunks[1::2], encoder)).correlation()
+    restored = CorrelationAccumulator.from_dict(accumulate(chunks, encoder).to_dict()).correlation()
+    for corr in (streamed, merged, restored):
+        np.testing.assert_allclose(corr.to_numpy(), expected.to_numpy(), atol=2e-14)
+
+
+def test_unencodable_rows_are_left_out(clean):
+    encoder = get_model().encoder
+    listings = clean.astype({"drive": str})
+    listings.iloc[:5, listings.columns.get_loc("drive")] = "hover"
+    corr = accumulate([listings], encoder).correlation()
+    expected = reference(clean.iloc[5:], encoder)
+    np.testing.assert_allclose(corr.to_numpy(), expected.to_numpy(), atol=2e-14)
@@ -0,0 +1,42 @@
+"""PriceCube checked against pandas/NumPy references on the shipped CSV."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils import data
+from utils.cube import RELATIVE_ACCURACY, PriceCube
+
+
+@pytest.fixture(scope="module")
+def clean():
+    return data.clean(data.read_raw())
+
+
+def test_cube_count_mean_top(clean):
+    cube = PriceCube.from_frame(clean)
+    grouped = clean["price"].astype(np.float64).groupby(clean["car"].astype(str))
+    pd.testing.assert_series_equal(cube.count("car"), grouped.count().rename("count"))
+    pd.testing.assert_series_equal(cube.mean("car"), grouped.mean().rename("price"), rtol=1e-12)
+
+    top = cube.top(10, by=["car", "model"])
+    expected = clean.sort_values("price", ascending=False, kind="stable").drop_duplicates(["car", "model"]).head(10)
+    np.testing.assert_array_equal(top["price"].to_numpy(), expected["price"].to_numpy(dtype=np.float64))
+    np.testing.assert_array_equal(clean.loc[top["row"], "price"].to_numpy(), expected["price"].to_numpy())
+
+
+def test_cube_quantiles_within_sketch_accuracy(clean):
+    qs = [0.05, 0.25, 0.5, 0.75, 0.95]
+    approx = PriceCube.from_frame(clean).quantiles("body", qs)
+    for body, prices in clean.groupby("body", observed=True)["price"]:
+        exact = np.quantile(prices.to_numpy(dtype=np.float64), qs, method="lower")
+        np.testing.assert_allclose(approx.loc[body].to_numpy(), exact, rtol=RELATIVE_ACCURACY)
+
+
+def test_cube_merge_matches_single_build(clean):
+    whole = PriceCube.from_frame(clean)
+    halves = PriceCube.from_frame(clean.iloc[::2]).merge(PriceCube.from_frame(clean.iloc[1::2]))
+    for by in ["car", ["body", "drive"]]:
+        pd.testing.assert_series_equal(halves.count(by), whole.count(by))
+        pd.testing.assert_series_equal(halves.mean(by), whole.mean(by), rtol=1e-12)
+        pd.testing.assert_frame_equal(halves.quantiles(by, [0.25, 0.5, 0.75]),
+                                      whole.quantiles(by, [0.25, 0.5, 0.75]))
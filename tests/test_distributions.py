@@ -0,0 +1,64 @@
+"""DistributionSummary histograms, moments and incremental updates."""
+import numpy as np
+import pytest
+
+from utils.distributions import DistributionSummary
+
+
+@pytest.fixture(scope="module")
+def values():
+    return np.random.default_rng(2).gamma(2.0, 5_000.0, 20_000)
+
+
+def test_histogram_is_exact(values):
+    summary = DistributionSummary(values)
+    # The maximum goes in the last bin even if the computed last edge rounds below it
+    expected, _ = np.histogram(np.clip(values, None, summary.edges[-1]), bins=summary.edges)
+    np.testing.assert_array_equal(summary.counts, expected)
+    assert summary.n == len(values)
+    assert summary.mean == pytest.approx(values.mean(), rel=1e-12)
+    assert summary.std == pytest.approx(values.std(ddof=1), rel=1e-12)
+
+
+def test_update_within_range_matches_a_rebuild(values):
+    # Both range ends in the first part, so the bins are the same as a rebuild's
+    ends = [values.argmin(), values.argmax()]
+    first = np.isin(np.arange(len(values)), ends) | (np.arange(len(values)) < 8_000)
+    summary = DistributionSummary(values[first]).update(values[~first])
+    rebuilt = DistributionSummary(values)
+    np.testing.assert_array_equal(summary.edges, rebuilt.edges)
+    np.testing.assert_array_equal(summary.counts, rebuilt.counts)
+    np.testing.assert_allclose(summary.grid, rebuilt.grid, rtol=1e-9, atol=1e-9)
+    assert summary.mean == pytest.approx(rebuilt.mean, rel=1e-12)
+    assert summary.std == pytest.approx(rebuilt.std, rel=1e-12)
+    np.testing.assert_allclose(summary.kde()[1], rebuilt.kde()[1], rtol=1e-9, atol=1e-15)
+
+
+def test_update_outside_range_extends_by_whole_bins(values):
+    low, high = np.sort(values)[[1_000, -1_000]]
+    middle = values[(values >= low) & (values <= high)]
+    summary = DistributionSummary(middle)
+    width = summary.bin_width
+    summary.update(values[(values < low) | (values > high)])
+    assert summary.bin_width == width
+    assert summary.edges[0] <= values.min() and summary.edges[-1] >= values.max()
+    expected, _ = np.histogram(np.clip(values, None, summary.edges[-1]), bins=summary.edges)
+    np.testing.assert_array_equal(summary.counts, expected)
+    assert summary.n == len(values)
+    assert (summary.min, summary.max) == (values.min(), values.max())
+    assert summary.mean == pytest.approx(values.mean(), rel=1e-12)
+
+
+def test_repeated_updates_stay_exact(values):
+    summary = DistributionSummary(values[:500])
+    for part in np.array_split(values[500:], 12):
+        summary.update(part)
+    expected, _ = np.histogram(np.clip(values, None, summary.edges[-1]), bins=summary.edges)
+    np.testing.assert_array_equal(summary.counts, expected)
+
+
+def test_kde_integrates_to_one(values):
+    summary = DistributionSummary(np.concatenate([values, [np.nan, np.inf]]))
+    assert summary.n == len(values)
+    x, density = summary.kde(points=2_000)
+    assert density.sum() * (x[1] - x[0]) == pytest.approx(1.0, abs=0.02)
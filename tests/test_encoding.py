@@ -0,0 +1,60 @@
+"""FeatureEncoder and CategoryCollapser against hand-built expectations."""
+import numpy as np
+import pandas as pd
+
+from utils import data
+from utils.categories import CategoryCollapser
+from utils.encoding import FEATURES, FeatureEncoder
+from utils.model_registry import get_model
+
+
+def test_encode_matches_transform_row_and_keeps_inputs(listing):
+    encoder = get_model().encoder
+    listing = {**listing, "engV": 1.998}
+    X, errors = encoder.encode(pd.DataFrame([listing]))
+    assert errors.tolist() == [""]
+    assert X[0].tolist() == encoder.transform_row(listing)
+    assert X[0, FEATURES.index("engV")] == 1.998
+    assert X[0, FEATURES.index("registration")] == 1
+
+
+def test_unseen_and_missing_labels(listing):
+    encoder = get_model().encoder
+    listings = pd.DataFrame([
+        {**listing, "car": "Trabant"},
+        {**listing, "drive": "hover"},
+        {**listing, "body": np.nan},
+        {**listing, "engV": "n/a"},
+    ])
+    X, errors = encoder.encode(listings)
+    assert errors.tolist() == ["", "unseen drive", "missing body", "invalid engV"]
+    assert encoder.vocabularies["car"][int(X[0, FEATURES.index("car")])] == "Other"
+
+    assert encoder.transform_row({**listing, "car": "Trabant"}) is not None
+    assert encoder.transform_row({**listing, "drive": "hover"}) is None
+    assert encoder.transform_row({**listing, "body": None}) is None
+
+
+def test_encoder_round_trips_through_dict():
+    encoder = get_model().encoder
+    restored = FeatureEncoder.from_dict(encoder.to_dict())
+    clean = data.load_dataset().clean
+    pd.testing.assert_frame_equal(restored.transform(clean), encoder.transform(clean))
+
+
+def test_collapser_matches_value_counts():
+    values = data.read_raw()["model"].dropna().astype(str)
+    counts = values.value_counts()
+    expected = values.where(values.map(counts) >= 10, "Other")
+
+    collapsed = CategoryCollapser(10).fit_transform(values)
+    pd.testing.assert_series_equal(collapsed.astype(str), expected)
+    from_counts = CategoryCollapser.from_counts(counts, 10)
+    assert from_counts.kept_.equals(CategoryCollapser(10).fit(values).kept_)
+
+
+def test_collapser_maps_unseen_to_other_and_keeps_missing():
+    collapser = CategoryCollapser.from_dict(CategoryCollapser(2).fit(pd.Series(["a", "a", "b"])).to_dict())
+    result = collapser.transform(pd.Series(["a", "b", "c", None]))
+    assert result.tolist()[:3] == ["a", "Other", "Other"]
+    assert pd.isna(result.iloc[3])
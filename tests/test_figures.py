@@ -0,0 +1,73 @@
+"""The PNG figure cache and chart rendering."""
+import matplotlib.pyplot as plt
+import pytest
+
+from utils import figures
+from utils.figures import FigureCache
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = FigureCache()
+    monkeypatch.setattr(figures, "figure_cache", cache)
+    return cache
+
+
+class Chart:
+    """A draw callback that counts its calls."""
+
+    def __init__(self, fail=False):
+        self.calls = 0
+        self.fail = fail
+
+    def __call__(self, plt, sns):
+        self.calls += 1
+        fig, ax = plt.subplots(figsize=(2, 2))
+        ax.plot([0, 1], [self.calls, 0])
+        if self.fail:
+            raise RuntimeError("draw failed")
+        return fig
+
+
+def test_least_recently_used_entries_are_evicted_beyond_max_bytes():
+    cache = FigureCache(max_bytes=10)
+    cache.put("a", b"aaaa")
+    cache.put("b", b"bbbb")
+    assert cache.get("a") == b"aaaa"
+    cache.put("c", b"cccc")
+    assert cache.get("b") is None
+    assert cache.get("a") == b"aaaa" and cache.get("c") == b"cccc"
+    assert cache.stats()["bytes"] == 8
+
+    # An entry larger than the whole budget is still kept, on its own
+    cache.put("big", b"x" * 20)
+    assert cache.stats()["entries"] == 1 and cache.get("big") is not None
+
+
+def test_each_key_is_drawn_once(cache):
+    chart = Chart()
+    first = figures.render(("fingerprint", "price", 35), chart)
+    assert figures.render(("fingerprint", "price", 35), chart) is first
+    assert chart.calls == 1
+    assert first.startswith(b"\x89PNG")
+
+    other = figures.render(("fingerprint", "price", 40), chart)
+    figures.render(("other-fingerprint", "price", 35), chart)
+    assert chart.calls == 3 and other != first
+    assert (cache.hits, cache.misses) == (1, 3)
+    assert plt.get_fignums() == []
+
+
+def test_figure_is_closed_when_draw_raises(cache):
+    plt.close("all")
+    with pytest.raises(RuntimeError, match="draw failed"):
+        figures.render(("fingerprint", "broken"), Chart(fail=True))
+    assert plt.get_fignums() == []
+    assert cache.stats()["entries"] == 0
+
+
+def test_show_displays_the_cached_image(cache):
+    chart = Chart()
+    figures.show(("fingerprint", "shown"), chart)
+    figures.show(("fingerprint", "shown"), chart)
+    assert chart.calls == 1
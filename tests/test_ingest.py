@@ -0,0 +1,27 @@
+"""Chunked ingestion checked against the source CSV and the in-memory clean."""
+import pandas as pd
+
+from utils import data, ingest
+
+READ_OPTIONS = {"index_col": 0, "float_precision": "round_trip", **ingest.CSV_OPTIONS}
+
+
+def test_chunked_clean_keeps_source_rows(tmp_path):
+    out = tmp_path / "clean.csv"
+    rows_read, rows_written = ingest.write_clean(data.DATA_PATH, out, chunksize=1000)
+    source = pd.read_csv(data.DATA_PATH, **READ_OPTIONS)
+    written = pd.read_csv(out, **READ_OPTIONS)
+    assert (rows_read, rows_written) == (len(source), len(written))
+
+    # Same rows, ids and values as the source file; only rare labels become "Other"
+    expected = source.loc[written.index]
+    kept = data.SHORTENED_COLUMNS
+    pd.testing.assert_frame_equal(written.drop(columns=kept), expected.drop(columns=kept))
+    for col in kept:
+        assert ((written[col] == expected[col]) | (written[col] == "Other")).all()
+
+    # ... and the rows and labels of the in-memory clean
+    clean = data.clean(data.read_raw())
+    pd.testing.assert_index_equal(written.index, source.index[clean.index])
+    for col in kept:
+        assert written[col].tolist() == clean[col].astype(str).tolist()
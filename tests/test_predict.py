@@ -0,0 +1,81 @@
+"""Uploaded-CSV parsing and chunked batch prediction."""
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.encoding import FEATURES
+from utils.model_registry import get_model
+from utils.predict import CHUNK_SIZE, missing_columns, predict_batch, predict_upload, read_listings
+
+
+def csv_bytes(listings, sep, encoding="utf-8"):
+    return pd.DataFrame(listings).to_csv(sep=sep, index=False).encode(encoding)
+
+
+@pytest.mark.parametrize("sep", [";", ","])
+def test_separator_is_taken_from_the_header(listing, sep):
+    df = read_listings(csv_bytes([listing, {**listing, "year": 2012}], sep))
+    assert list(df.columns) == list(listing)
+    assert df["year"].tolist() == [2008, 2012]
+    assert missing_columns(df) == []
+
+
+def test_non_utf8_files_are_read_as_latin1(listing):
+    df = read_listings(csv_bytes([{**listing, "car": "Citroën"}], ";", encoding="ISO-8859-1"))
+    assert df["car"].tolist() == ["Citroën"]
+
+
+def test_unreadable_files_and_missing_columns(listing):
+    with pytest.raises(ValueError, match="not a readable CSV"):
+        read_listings(b"")
+    df = read_listings(csv_bytes([{k: v for k, v in listing.items() if k != "drive"}], ","))
+    assert missing_columns(df) == ["drive"]
+
+
+def test_unseen_labels_are_flagged_not_priced(listing):
+    df = pd.DataFrame([listing, {**listing, "drive": "hover"}, {**listing, "car": "Trabant"}])
+    result = predict_batch(df, get_model())
+    assert result["error"].tolist() == ["", "unseen drive", ""]
+    assert np.isnan(result["predicted_price"][1])
+    assert result["predicted_price"][[0, 2]].notna().all()
+
+
+def test_chunks_cover_every_row_and_progress_reaches_one(listing):
+    bundle = get_model()
+    rows = 2 * CHUNK_SIZE + 7
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame([listing] * rows).assign(
+        year=rng.integers(1990, 2016, rows), mileage=rng.integers(0, 400, rows))
+    df.loc[[3, CHUNK_SIZE, rows - 1], "drive"] = "hover"
+
+    seen = []
+    result = predict_batch(df, bundle, progress=seen.append)
+    assert seen[-1] == 1.0 and seen == sorted(seen) and len(seen) >= 3
+    X, errors = bundle.encoder.encode(df)
+    expected = bundle.model.predict(pd.DataFrame(X[errors == ""], columns=FEATURES))
+    np.testing.assert_array_equal(result["predicted_price"][errors == ""].to_numpy(), expected)
+    assert result["predicted_price"].isna().sum() == 3
+
+
+def test_uploads_are_priced_once_per_file_and_model(listing):
+    real = get_model()
+    calls = []
+
+    class CountingModel:
+        def predict(self, X):
+            calls.append(len(X))
+            return real.model.predict(X)
+
+    raw = csv_bytes([listing, {**listing, "year": 2011}], ";")
+    first = SimpleNamespace(content_hash="upload-test-1", encoder=real.encoder, model=CountingModel())
+    missing, result = predict_upload(raw, first)
+    assert missing == [] and len(result) == 2
+    assert predict_upload(raw, first)[1] is result
+    assert len(calls) == 1
+
+    second = SimpleNamespace(content_hash="upload-test-2", encoder=real.encoder, model=CountingModel())
+    predict_upload(raw, second)
+    predict_upload(raw.replace(b"2011", b"2012"), second)
+    assert len(calls) == 3
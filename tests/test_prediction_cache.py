@@ -0,0 +1,57 @@
+"""PredictionCache hits, eviction, expiry and invalidation."""
+from types import SimpleNamespace
+
+from utils.model_registry import get_model
+from utils.prediction_cache import PredictionCache
+
+
+class CountingModel:
+    def __init__(self):
+        self.calls = 0
+
+    def predict(self, X):
+        self.calls += 1
+        return [sum(X[0])]
+
+
+def bundle(content_hash="m1"):
+    return SimpleNamespace(content_hash=content_hash, model=CountingModel())
+
+
+def test_hit_returns_the_model_price_without_predicting(listing):
+    real = get_model()
+    row = real.encoder.transform_row(listing)
+    cache = PredictionCache()
+    price = cache.predict(real, row)
+    assert price == float(real.model.predict([row])[0])
+
+    fake = SimpleNamespace(content_hash=real.content_hash, model=CountingModel())
+    assert cache.predict(fake, list(row)) == price
+    assert fake.model.calls == 0
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_least_recently_used_entry_is_evicted():
+    b, cache = bundle(), PredictionCache(max_entries=2)
+    for row in ([1], [2], [1], [3]):
+        cache.predict(b, row)
+    cache.predict(b, [1])
+    cache.predict(b, [2])
+    assert b.model.calls == 4  # [1], [2], [3], then [2] again
+    assert cache.evictions == 2
+
+
+def test_expired_entries_are_recomputed():
+    b, cache = bundle(), PredictionCache(ttl=0)
+    cache.predict(b, [1])
+    cache.predict(b, [1])
+    assert b.model.calls == 2
+
+
+def test_new_model_invalidates_entries():
+    cache = PredictionCache()
+    old, new = bundle("m1"), bundle("m2")
+    cache.predict(old, [1])
+    cache.predict(new, [1])
+    assert new.model.calls == 1
+    assert cache.invalidations == 1 and cache.stats()["entries"] == 1
@@ -0,0 +1,25 @@
+"""RowIndex selections checked against boolean masks."""
+import numpy as np
+
+from utils import data
+from utils.row_index import RowIndex
+
+
+def test_row_index_matches_boolean_masks():
+    complete = data.read_raw().dropna()
+    index = RowIndex(complete)
+    rng = np.random.default_rng(0)
+    for _ in range(200):
+        brands = list(rng.choice(index.labels("car"), rng.integers(0, 4), replace=False))
+        bodies = list(rng.choice(index.labels("body"), rng.integers(0, 3), replace=False))
+        years = tuple(sorted(rng.integers(1960, 2017, 2).tolist()))
+        prices = tuple(sorted(rng.uniform(0, 200_000, 2).tolist()))
+
+        mask = complete["year"].between(*years) & complete["price"].between(*prices)
+        if brands:
+            mask &= complete["car"].isin(brands)
+        if bodies:
+            mask &= complete["body"].isin(bodies)
+        rows = index.select({"car": brands, "body": bodies}, {"year": years, "price": prices})
+        np.testing.assert_array_equal(np.arange(len(complete)) if rows is None else rows,
+                                      np.flatnonzero(mask.to_numpy()))
@@ -0,0 +1,50 @@
+"""Stratified sampling and the stratified mean |SHAP| estimate."""
+import numpy as np
+import pytest
+
+from utils.sampling import MIN_PER_STRATUM, allocate, mean_abs_shap, stratified_sample
+
+FEATURES = ["a", "b", "c"]
+
+
+@pytest.fixture(scope="module")
+def population():
+    rng = np.random.default_rng(1)
+    row_strata = rng.integers(0, 40, 20_000) * 7
+    values = rng.normal(row_strata[:, None] / 50, 1 + row_strata[:, None] / 100, (20_000, len(FEATURES)))
+    return row_strata, values
+
+
+def test_allocation_is_proportional_with_a_floor():
+    sizes = np.array([1, 3, 50, 500, 5_000])
+    counts = allocate(sizes, 600)
+    assert counts.sum() == 600
+    assert (counts <= sizes).all()
+    assert (counts >= np.minimum(sizes, MIN_PER_STRATUM)).all()
+    assert counts[4] > counts[3] > counts[2]
+
+
+def test_sample_follows_the_allocation(population):
+    row_strata, _ = population
+    rows = stratified_sample(row_strata, 2_000)
+    assert len(rows) == 2_000 and (np.diff(rows) > 0).all()
+    labels, sizes = np.unique(row_strata, return_counts=True)
+    drawn = np.array([(row_strata[rows] == label).sum() for label in labels])
+    np.testing.assert_array_equal(drawn, allocate(sizes, 2_000))
+    np.testing.assert_array_equal(rows, stratified_sample(row_strata, 2_000))
+    np.testing.assert_array_equal(stratified_sample(row_strata, len(row_strata)), np.arange(len(row_strata)))
+
+
+def test_full_sample_is_exact(population):
+    row_strata, values = population
+    result = mean_abs_shap(values, row_strata, np.arange(len(values)), FEATURES)
+    np.testing.assert_allclose(result.loc[FEATURES, "mean_abs"], np.abs(values).mean(axis=0), rtol=1e-12)
+    np.testing.assert_allclose(result["std_error"], 0, atol=1e-12)
+
+
+def test_estimate_is_within_its_error(population):
+    row_strata, values = population
+    truth = np.abs(values).mean(axis=0)
+    result = mean_abs_shap(values, row_strata, stratified_sample(row_strata, 1_000), FEATURES).loc[FEATURES]
+    assert (np.abs(result["mean_abs"] - truth) < 4 * result["std_error"]).all()
+    assert (result["std_error"] > 0).all()
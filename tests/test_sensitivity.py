@@ -0,0 +1,48 @@
+"""What-if sweeps checked against pricing each altered listing directly."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.encoding import FEATURES
+from utils.model_registry import get_model
+from utils.sensitivity import CATEGORICAL_SWEEPS, NUMERIC_SWEEPS, sweep, sweep_grid
+
+
+@pytest.fixture(scope="module")
+def bundle():
+    return get_model()
+
+
+@pytest.fixture
+def row(bundle, listing):
+    return bundle.encoder.transform_row(listing)
+
+
+def test_curves_match_predictions_with_one_feature_replaced(bundle, row):
+    curves = sweep(bundle, row)
+    assert set(curves) == set(NUMERIC_SWEEPS) | set(CATEGORICAL_SWEEPS)
+    for col, curve in curves.items():
+        position = FEATURES.index(col)
+        if col in NUMERIC_SWEEPS:
+            codes = curve.index.to_numpy()
+        else:
+            codes = [bundle.encoder.vocabularies[col].index(label) for label in curve.index]
+        altered = [row[:position] + [code] + row[position + 1:] for code in codes]
+        expected = bundle.model.predict(pd.DataFrame(altered, columns=FEATURES, dtype=np.float64))
+        np.testing.assert_allclose(curve.to_numpy(), expected, rtol=1e-12, err_msg=col)
+
+
+def test_current_value_lies_on_the_grid(bundle, row, listing):
+    price = bundle.model.predict(pd.DataFrame([row], columns=FEATURES, dtype=np.float64))[0]
+    curves = sweep(bundle, row)
+    for col in [*NUMERIC_SWEEPS, *CATEGORICAL_SWEEPS]:
+        assert listing[col] in curves[col].index
+        assert curves[col][listing[col]] == pytest.approx(price, rel=1e-12)
+
+
+def test_grid_blocks_change_only_their_feature(bundle, row):
+    X, blocks = sweep_grid(bundle.encoder, row, numeric={"year": [2000, 2010]}, categorical=["drive"])
+    assert len(X) == 2 + len(bundle.encoder.vocabularies["drive"])
+    for col, (_, rows) in blocks.items():
+        others = [i for i, feature in enumerate(FEATURES) if feature != col]
+        np.testing.assert_array_equal(X[rows][:, others], np.tile(np.asarray(row)[others], (len(X[rows]), 1)))
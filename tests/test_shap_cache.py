@@ -0,0 +1,148 @@
+"""The on-disk SHAP cache, local explanations and the process-pool pass."""
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils import shap_cache
+from utils.caching import VersionedCache
+from utils.data import load_encoded
+from utils.model_registry import get_model
+
+
+class StubPass:
+    """Stands in for compute_shap_values, so the cache tests run without shap."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, model, X, workers=None):
+        self.calls += 1
+        values = np.arange(X.size, dtype=np.float32).reshape(X.shape) + self.calls
+        return values, np.full(len(X), float(self.calls), dtype=np.float32)
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    stub = StubPass()
+    monkeypatch.setattr(shap_cache, "compute_shap_values", stub)
+    monkeypatch.setattr(shap_cache, "_loaded", VersionedCache())
+    return stub
+
+
+@pytest.fixture
+def small():
+    return pd.DataFrame({"a": [1.0, 2.0, 3.0], "b": [4.0, 5.0, 6.0]}, index=[10, 20, 30])
+
+
+def forget_loaded(monkeypatch):
+    monkeypatch.setattr(shap_cache, "_loaded", VersionedCache())
+
+
+def test_entry_round_trips_through_disk(stub, small, tmp_path, monkeypatch):
+    result = shap_cache.get_shap_values(None, small, "model-1", "data-1", cache_dir=tmp_path)
+    assert shap_cache.get_shap_values(None, small, "model-1", "data-1", cache_dir=tmp_path) is result
+
+    forget_loaded(monkeypatch)
+    assert shap_cache.is_cached("model-1", "data-1", cache_dir=tmp_path)
+    loaded = shap_cache.get_shap_values(None, small, "model-1", "data-1", cache_dir=tmp_path)
+    assert stub.calls == 1
+    assert isinstance(loaded.values, np.memmap)
+    np.testing.assert_array_equal(loaded.values, np.arange(6).reshape(3, 2) + 1)
+    np.testing.assert_array_equal(loaded.base_values, [1, 1, 1])
+    pd.testing.assert_frame_equal(loaded.frame(), small.astype(np.float32))
+    assert loaded.key == shap_cache.cache_key("model-1", "data-1")
+    assert [p.name for p in tmp_path.iterdir()] == [loaded.key]
+
+
+def test_entries_are_keyed_on_model_and_dataset(stub, small, tmp_path):
+    keys = {shap_cache.get_shap_values(None, small, model, data, cache_dir=tmp_path).key
+            for model, data in [("m1", "d1"), ("m2", "d1"), ("m1", "d2")]}
+    assert len(keys) == 3 and stub.calls == 3
+    assert not shap_cache.is_cached("m2", "d2", cache_dir=tmp_path)
+
+
+@pytest.mark.parametrize("damage", ["truncate values", "drop meta", "old format"])
+def test_damaged_entries_are_rebuilt(stub, small, tmp_path, monkeypatch, damage):
+    key = shap_cache.get_shap_values(None, small, "m", "d", cache_dir=tmp_path).key
+    directory = tmp_path / key
+    if damage == "truncate values":
+        (directory / "values.npy").write_bytes((directory / "values.npy").read_bytes()[:-8])
+    elif damage == "drop meta":
+        (directory / "meta.json").unlink()
+    else:
+        (directory / "meta.json").write_text('{"format": 0}', encoding="utf-8")
+    # A scratch directory left behind by an interrupted write is ignored
+    (tmp_path / f"{key}.999.tmp").mkdir()
+
+    forget_loaded(monkeypatch)
+    result = shap_cache.get_shap_values(None, small, "m", "d", cache_dir=tmp_path)
+    assert stub.calls == 2
+    np.testing.assert_array_equal(result.base_values, [2, 2, 2])
+
+
+@pytest.fixture(scope="module")
+def X():
+    return load_encoded().iloc[:3 * shap_cache.MIN_CHUNK_ROWS]
+
+
+def test_parallel_pass_equals_serial(X):
+    pytest.importorskip("shap")
+    model = get_model().model
+    serial_values, serial_base = shap_cache.compute_shap_values(model, X, workers=1)
+    values, base_values = shap_cache.compute_shap_values(model, X, workers=2)
+    np.testing.assert_array_equal(values, serial_values)
+    np.testing.assert_array_equal(base_values, serial_base)
+
+
+
+@pytest.fixture
+def local(monkeypatch):
+    """Empty global and local caches, and a count of rows explained locally."""
+    pytest.importorskip("shap")
+    monkeypatch.setattr(shap_cache, "_loaded", VersionedCache())
+    monkeypatch.setattr(shap_cache, "_local", OrderedDict())
+    explainer = shap_cache._explainer
+    explained = []
+
+    def counting(model, model_hash):
+        def explain(rows):
+            explained.append(len(rows))
+            return explainer(model, model_hash)(rows)
+        return explain
+
+    monkeypatch.setattr(shap_cache, "_explainer", counting)
+    return explained
+
+
+def test_local_values_match_the_global_pass(local, X, tmp_path):
+    model, X = get_model().model, X.iloc[:200]
+    values, base_values = shap_cache.compute_shap_values(model, X, workers=1)
+
+    rows = [5, 17, 150]
+    computed = shap_cache.explain_rows(model, X, rows, "m", "d")
+    assert local == [3]
+    np.testing.assert_allclose(computed.values, values[rows], rtol=1e-5, atol=1e-3)
+    np.testing.assert_allclose(computed.base_values, base_values[rows], rtol=1e-5)
+    np.testing.assert_array_equal(computed.data, X.iloc[rows].to_numpy(dtype=np.float32))
+
+    shap_cache.get_shap_values(model, X, "m", "d", cache_dir=tmp_path)
+    sliced = shap_cache.explain_rows(model, X, [6, 18], "m", "d")
+    assert local == [3]
+    np.testing.assert_array_equal(sliced.values, values[[6, 18]])
+
+
+def test_recent_rows_are_served_from_the_lru(local, X, monkeypatch):
+    monkeypatch.setattr(shap_cache, "LOCAL_CACHE_SIZE", 2)
+    model, X = get_model().model, X.iloc[:50]
+    first = shap_cache.explain_rows(model, X, [1], "m", "d")
+    shap_cache.explain_rows(model, X, [2], "m", "d")
+    assert shap_cache.explain_rows(model, X, [1], "m", "d") is first
+    assert len(local) == 2
+
+    shap_cache.explain_rows(model, X, [3], "m", "d")  # evicts [2], the least recent
+    assert shap_cache.explain_rows(model, X, [1], "m", "d") is first
+    shap_cache.explain_rows(model, X, [2], "m", "d")
+    assert len(local) == 4
+    assert shap_cache.explain_rows(model, X, [1], "other-model", "d") is not first
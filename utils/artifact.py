@@ -0,0 +1,183 @@
+"""Versioned, pickle-free model artifact.
+
+An artifact is a directory holding
+
+* ``manifest.json``: format version, feature order, training-data hash,
+  the SHA-256 of every component file and the artifact's content hash;
+* ``model.txt``: the LightGBM booster in LightGBM's native text format;
+* ``encoder.json``: the :class:`~utils.encoding.FeatureEncoder` vocabularies.
+
+Nothing in it is executed on load: the booster is parsed by LightGBM and the
+encoder is plain JSON. :func:`read_manifest` validates the manifest;
+:func:`load_model` and :func:`load_encoder` check a component against its
+recorded hash before parsing it. The content hash covers the component
+hashes and the feature order, so it changes exactly when the model or its
+encoding does, and it is the key of every downstream cache.
+
+A model pickled by the original training notebook (the regressor plus its
+four ``LabelEncoder`` objects; unpickling it needs scikit-learn, which the app
+itself does not) is converted with::
+
+    python -m utils.artifact old_model.pkl model --training-data car_ad_display.csv
+"""
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import shutil
+from datetime import datetime, timezone
+from pathlib import Path
+
+from utils.encoding import FEATURES, FeatureEncoder
+
+FORMAT = "car-price-model"
+FORMAT_VERSION = 1
+MANIFEST = "manifest.json"
+MODEL_FILE = "model.txt"
+ENCODER_FILE = "encoder.json"
+
+# Keys of the label encoders in a notebook pickle
+PICKLE_ENCODER_KEYS = {"car": "le_car", "body": "le_body", "engType": "le_engType", "drive": "le_drive"}
+
+
+def content_hash(features, files):
+    """Hash identifying an artifact: its feature order and component hashes."""
+    raw = json.dumps({"features": list(features), "files": files}, sort_keys=True).encode()
+    return hashlib.sha256(raw).hexdigest()
+
+
+def export(model, encoder, directory, training_data=None, source=None):
+    """Write ``model`` (an LGBMRegressor or Booster) and ``encoder`` as an artifact.
+
+    ``training_data`` and ``source`` are files whose hashes are recorded for
+    provenance. The new artifact is written completely next to ``directory``,
+    then swapped in with two renames (old one aside, new one into place), so
+    readers see either the old or the new artifact, never a partial one; a
+    reader opening it exactly between the renames finds no manifest.
+    """
+    from utils.snapshot import file_hash
+    import lightgbm
+
+    booster = getattr(model, "booster_", model)
+    if list(booster.feature_name()) != FEATURES:
+        raise ValueError(f"model features {booster.feature_name()} do not match {FEATURES}")
+
+    directory = Path(directory)
+    tmp = directory.with_name(f"{directory.name}.tmp-{os.getpid()}")
+    old = directory.with_name(f"{directory.name}.old-{os.getpid()}")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+    try:
+        booster.save_model(str(tmp / MODEL_FILE))
+        with open(tmp / ENCODER_FILE, "w", encoding="utf-8") as f:
+            json.dump(encoder.to_dict(), f, indent=1, ensure_ascii=False)
+        files = {name: file_hash(tmp / name) for name in (MODEL_FILE, ENCODER_FILE)}
+        manifest = {
+            "format": FORMAT,
+            "format_version": FORMAT_VERSION,
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "features": FEATURES,
+            "target": "price",
+            "lightgbm_version": lightgbm.__version__,
+            "num_trees": booster.num_trees(),
+            "training_data": _provenance(training_data),
+            "source": _provenance(source),
+            "files": files,
+            "content_hash": content_hash(FEATURES, files),
+        }
+        with open(tmp / MANIFEST, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        if directory.exists():
+            os.replace(directory, old)
+        os.replace(tmp, directory)
+    except BaseException:
+        if old.exists() and not directory.exists():
+            os.replace(old, directory)
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+    shutil.rmtree(old, ignore_errors=True)
+    return manifest
+
+
+def read_manifest(directory):
+    """Load and validate the manifest of the artifact in ``directory``."""
+    path = Path(directory) / MANIFEST
+    try:
+        with open(path, encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError) as exc:
+        raise ValueError(f"cannot read model manifest {path}: {exc}") from exc
+
+    if manifest.get("format") != FORMAT or manifest.get("format_version") != FORMAT_VERSION:
+        raise ValueError(f"{path}: unsupported artifact format "
+                         f"{manifest.get('format')!r} v{manifest.get('format_version')!r}")
+    files = manifest.get("files") or {}
+    missing = [name for name in (MODEL_FILE, ENCODER_FILE) if name not in files]
+    if missing:
+        raise ValueError(f"{path}: manifest lists no hash for {', '.join(missing)}")
+    if manifest.get("features") != FEATURES:
+        raise ValueError(f"{path}: artifact features {manifest.get('features')} do not match {FEATURES}")
+    if manifest.get("content_hash") != content_hash(manifest["features"], files):
+        raise ValueError(f"{path}: content hash does not match the manifest")
+    return manifest
+
+
+def load_model(directory, manifest):
+    """Parse the artifact's LightGBM booster."""
+    import lightgbm
+
+    text = _read_verified(directory, manifest, MODEL_FILE).decode("utf-8")
+    booster = lightgbm.Booster(model_str=text)
+    if list(booster.feature_name()) != manifest["features"]:
+        raise ValueError(f"{directory}: booster features {booster.feature_name()} do not match the manifest")
+    return booster
+
+
+def load_encoder(directory, manifest):
+    return FeatureEncoder.from_dict(json.loads(_read_verified(directory, manifest, ENCODER_FILE)))
+
+
+def _read_verified(directory, manifest, name):
+    path = Path(directory) / name
+    with open(path, "rb") as f:
+        payload = f.read()
+    if hashlib.sha256(payload).hexdigest() != manifest["files"][name]:
+        raise ValueError(f"{path} does not match the hash recorded in its manifest")
+    return payload
+
+
+def _provenance(path):
+    if path is None:
+        return None
+    from utils.snapshot import file_hash
+    return {"path": Path(path).name, "sha256": file_hash(path)}
+
+
+def read_pickle(path):
+    """Return ``(model, encoder)`` from a notebook pickle. Only use trusted files."""
+    with open(path, "rb") as f:
+        data = pickle.load(f)
+    if "encoder" in data:
+        encoder = FeatureEncoder.from_dict(data["encoder"])
+    else:
+        encoder = FeatureEncoder.from_label_encoders({col: data[key] for col, key in PICKLE_ENCODER_KEYS.items()})
+    return data["model"], encoder
+
+
+def main(argv=None):
+    from utils.data import DATA_PATH
+
+    parser = argparse.ArgumentParser(description="Convert a pickled model into a versioned artifact directory.")
+    parser.add_argument("source", help="pickle from the training notebook")
+    parser.add_argument("directory", help="artifact directory to (re)create")
+    parser.add_argument("--training-data", default=str(DATA_PATH), help="listings file the model was trained on")
+    args = parser.parse_args(argv)
+
+    model, encoder = read_pickle(args.source)
+    manifest = export(model, encoder, args.directory, training_data=args.training_data, source=args.source)
+    print(f"{args.directory}: {manifest['num_trees']} trees, content hash {manifest['content_hash'][:16]}")
+
+
+if __name__ == "__main__":
+    main()
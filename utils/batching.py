@@ -0,0 +1,89 @@
+"""Coalescing of concurrent single-item requests into micro-batches."""
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+import numpy as np
+
+
+class MicroBatcher:
+    """Run ``handler`` on batches of items submitted from many threads.
+
+    A worker thread takes the first waiting item, then keeps collecting until
+    it has ``max_batch_size`` items or ``max_wait_ms`` has passed. It calls
+    ``handler(items)`` once, which must return one result per item.
+    :meth:`submit` returns a ``Future`` for the item's result.
+    """
+
+    def __init__(self, handler, max_batch_size=64, max_wait_ms=5.0, window=10_000):
+        self.handler = handler
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue = queue.Queue()
+        self._latencies = deque(maxlen=window)
+        self._batch_sizes = deque(maxlen=window)
+        self._batch_times = deque(maxlen=window)
+        self._completed = 0
+        self._worker = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, item):
+        future = Future()
+        self._queue.put((item, future, time.perf_counter()))
+        return future
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.perf_counter() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._process(batch)
+
+    def _process(self, batch):
+        items = [item for item, _, _ in batch]
+        try:
+            results = list(self.handler(items))
+            if len(results) != len(batch):
+                raise RuntimeError(f"handler returned {len(results)} results for {len(batch)} items")
+        except Exception as exc:
+            for _, future, _ in batch:
+                future.set_exception(exc)
+            return
+
+        now = time.perf_counter()
+        for (_, future, submitted), result in zip(batch, results):
+            future.set_result(result)
+            self._latencies.append(now - submitted)
+        self._batch_sizes.append(len(batch))
+        self._batch_times.append(now)
+        self._completed += len(batch)
+
+    def stats(self):
+        """Latency percentiles (ms), mean batch size and throughput.
+
+        Everything is computed over the last ``window`` requests/batches;
+        throughput is items per second between the first and last batch in
+        that window, so idle time before a load test does not dilute it.
+        """
+        latencies = np.array(self._latencies) * 1000
+        sizes, times = list(self._batch_sizes), list(self._batch_times)
+        elapsed = times[-1] - times[0] if len(times) > 1 else 0.0
+        return {
+            "requests": self._completed,
+            "batches": len(sizes),
+            "mean_batch_size": float(np.mean(sizes)) if sizes else 0.0,
+            "p50_ms": float(np.percentile(latencies, 50)) if len(latencies) else None,
+            "p99_ms": float(np.percentile(latencies, 99)) if len(latencies) else None,
+            "throughput_rps": sum(sizes[1:]) / elapsed if elapsed > 0 else 0.0,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+        }
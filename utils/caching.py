@@ -0,0 +1,68 @@
+"""Process-wide caches of values derived from one version of the data or model."""
+import threading
+from concurrent.futures import Future
+
+_MISSING = object()
+
+
+class VersionedCache:
+    """Entries keyed on ``(version, key)``, where ``version`` is a content hash.
+
+    Storing an entry for a new version drops every entry of the previous
+    one, so replacing the listings file or the model frees what was built
+    from the old revision. Values are built outside the lock; concurrent
+    misses for the same entry wait on the first caller's future. With
+    ``max_entries``, the oldest entries of the current version are dropped
+    beyond that many.
+    """
+
+    def __init__(self, max_entries=None):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._pending = {}
+        self._version = None
+
+    def get(self, version, key, build):
+        """Return the entry for ``(version, key)``, calling ``build()`` on a miss."""
+        entry = (version, key)
+        value = self._entries.get(entry, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        with self._lock:
+            value = self._entries.get(entry, _MISSING)
+            if value is not _MISSING:
+                return value
+            future = self._pending.get(entry)
+            owner = future is None
+            if owner:
+                future = self._pending[entry] = Future()
+        if not owner:
+            return future.result()
+
+        try:
+            value = build()
+        except BaseException as exc:
+            with self._lock:
+                del self._pending[entry]
+            future.set_exception(exc)
+            raise
+        with self._lock:
+            del self._pending[entry]
+            if version != self._version:
+                self._entries = {}
+                self._version = version
+            self._entries[entry] = value
+            if self.max_entries is not None:
+                while len(self._entries) > self.max_entries:
+                    del self._entries[next(iter(self._entries))]
+        future.set_result(value)
+        return value
+
+    def peek(self, version, key, default=None):
+        """The entry for ``(version, key)`` if it is already built."""
+        return self._entries.get((version, key), default)
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,79 @@
+"""Collapsing of rare category labels into a single ``"Other"`` bucket."""
+import numpy as np
+import pandas as pd
+
+
+class CategoryCollapser:
+    """Keep labels seen at least ``cutoff`` times and map the rest to ``other``.
+
+    The work is done on categorical codes: counting is a single ``bincount``
+    and applying the mapping is one lookup-table gather, so both steps stay
+    linear in the number of rows however many distinct labels there are.
+    The fitted state is just the sorted list of kept labels, which makes it
+    cheap to store with a model and reapply to new listings.
+    """
+
+    def __init__(self, cutoff=10, other="Other"):
+        self.cutoff = cutoff
+        self.other = other
+        self.kept_ = None
+
+    def fit(self, values):
+        codes, uniques = _codes(values)
+        counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+        return self._fit_counts(uniques, counts)
+
+    @classmethod
+    def from_counts(cls, counts, cutoff=10, other="Other"):
+        """Fit from a label -> frequency Series, e.g. accumulated over file chunks."""
+        return cls(cutoff, other)._fit_counts(counts.index, counts.to_numpy())
+
+    def _fit_counts(self, labels, counts):
+        self.kept_ = pd.Index(labels[counts >= self.cutoff]).sort_values()
+        return self
+
+    @property
+    def categories_(self):
+        """Output categories: kept labels followed by ``other`` if not already kept."""
+        if self.other in self.kept_:
+            return self.kept_
+        return self.kept_.append(pd.Index([self.other]))
+
+    def transform(self, values):
+        """Return ``values`` as a categorical with rare and unseen labels collapsed.
+
+        Missing values stay missing.
+        """
+        if self.kept_ is None:
+            raise ValueError("CategoryCollapser must be fitted before transform")
+        codes, uniques = _codes(values)
+        categories = self.categories_
+        lookup = categories.get_indexer(uniques)
+        lookup[lookup < 0] = categories.get_loc(self.other)
+        # Extra slot so code -1 (missing) indexes to -1 again
+        lookup = np.append(lookup, -1)
+        result = pd.Categorical.from_codes(lookup[codes], categories=categories)
+        if isinstance(values, pd.Series):
+            return pd.Series(result, index=values.index, name=values.name)
+        return result
+
+    def fit_transform(self, values):
+        return self.fit(values).transform(values)
+
+    def to_dict(self):
+        return {"cutoff": self.cutoff, "other": self.other, "kept": self.kept_.tolist()}
+
+    @classmethod
+    def from_dict(cls, state):
+        collapser = cls(state["cutoff"], state["other"])
+        collapser.kept_ = pd.Index(state["kept"])
+        return collapser
+
+
+def _codes(values):
+    """Return ``(codes, uniques)`` for ``values`` with -1 marking missing entries."""
+    if isinstance(getattr(values, "dtype", None), pd.CategoricalDtype):
+        categorical = values.array if isinstance(values, pd.Series) else values
+        return np.asarray(categorical.codes, dtype=np.intp), categorical.categories
+    codes, uniques = pd.factorize(values)
+    return codes.astype(np.intp, copy=False), pd.Index(uniques)
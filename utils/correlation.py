@@ -0,0 +1,130 @@
+"""Streaming, mergeable correlation matrix.
+
+:class:`CorrelationAccumulator` keeps only the row count, the column means
+and the co-moment matrix, and folds in one chunk at a time with the pairwise
+update of Chan et al. Partial accumulators built in separate processes can be
+merged the same way. The full dataset never has to be in memory, and the
+state is small enough to persist as JSON so page reruns skip the computation.
+"""
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from utils.caching import VersionedCache
+from utils.encoding import FEATURES
+
+ROOT = Path(__file__).resolve().parent.parent
+CACHE_DIR = ROOT / ".cache" / "correlation"
+
+# Column order of the Feature Relationships heatmap
+COLUMNS = ["car", "price", "body", "mileage", "engV", "engType", "registration", "year", "drive"]
+
+_matrices = VersionedCache()
+
+
+class CorrelationAccumulator:
+    def __init__(self, columns):
+        self.columns = list(columns)
+        k = len(self.columns)
+        self.n = 0
+        self.mean = np.zeros(k)
+        self.comoment = np.zeros((k, k))
+
+    def update(self, chunk):
+        """Fold in a chunk (DataFrame with ``columns`` or 2D array in that order).
+
+        Rows with any missing value are skipped.
+        """
+        if isinstance(chunk, pd.DataFrame):
+            chunk = chunk[self.columns].to_numpy(dtype=np.float64)
+        chunk = np.asarray(chunk, dtype=np.float64)
+        chunk = chunk[~np.isnan(chunk).any(axis=1)]
+        if len(chunk) == 0:
+            return self
+        mean = chunk.mean(axis=0)
+        centered = chunk - mean
+        return self._combine(len(chunk), mean, centered.T @ centered)
+
+    def merge(self, other):
+        """Combine with an accumulator built over other rows (e.g. another worker)."""
+        if other.columns != self.columns:
+            raise ValueError("Cannot merge accumulators over different columns")
+        if other.n:
+            self._combine(other.n, other.mean, other.comoment)
+        return self
+
+    def _combine(self, n, mean, comoment):
+        total = self.n + n
+        delta = mean - self.mean
+        self.comoment = self.comoment + comoment + np.outer(delta, delta) * (self.n * n / total)
+        self.mean = self.mean + delta * (n / total)
+        self.n = total
+        return self
+
+    def covariance(self, ddof=1):
+        return pd.DataFrame(self.comoment / (self.n - ddof), index=self.columns, columns=self.columns)
+
+    def correlation(self):
+        """Pearson correlation; constant columns get NaN like ``DataFrame.corr``."""
+        std = np.sqrt(np.diag(self.comoment))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            corr = self.comoment / np.outer(std, std)
+        np.fill_diagonal(corr, np.where(std > 0, 1.0, np.nan))
+        return pd.DataFrame(np.clip(corr, -1, 1), index=self.columns, columns=self.columns)
+
+    def to_dict(self):
+        return {"columns": self.columns, "n": self.n,
+                "mean": self.mean.tolist(), "comoment": self.comoment.tolist()}
+
+    @classmethod
+    def from_dict(cls, state):
+        acc = cls(state["columns"])
+        acc.n = state["n"]
+        acc.mean = np.asarray(state["mean"], dtype=np.float64)
+        acc.comoment = np.asarray(state["comoment"], dtype=np.float64)
+        return acc
+
+
+def accumulate(chunks, encoder, columns=COLUMNS):
+    """Build an accumulator from cleaned listing chunks, encoding each with ``encoder``.
+
+    Rows the encoder cannot encode (e.g. a label unseen in a column without
+    an "other" bucket) are left out.
+    """
+    acc = CorrelationAccumulator(columns)
+    for chunk in chunks:
+        X, errors = encoder.encode(chunk)
+        encoded = pd.DataFrame(X, columns=FEATURES).assign(price=chunk["price"].to_numpy(dtype=np.float64))
+        acc.update(encoded[errors == ""])
+    return acc
+
+
+def get_correlation(dataset, bundle, chunk_size=100_000, cache_dir=CACHE_DIR):
+    """Correlation matrix of the cleaned dataset, persisted per (dataset, model)."""
+    key = f"{dataset.fingerprint[:16]}-{bundle.content_hash[:16]}"
+
+    def build():
+        path = Path(cache_dir) / f"{key}.json"
+        try:
+            acc = CorrelationAccumulator.from_dict(json.loads(path.read_text(encoding="utf-8")))
+        except (OSError, ValueError, KeyError):
+            clean = dataset.clean
+            chunks = (clean.iloc[start:start + chunk_size] for start in range(0, len(clean), chunk_size))
+            acc = accumulate(chunks, bundle.encoder)
+            _save(path, acc)
+        return acc.correlation()
+
+    return _matrices.get(key, None, build)
+
+
+def _save(path, acc):
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(acc.to_dict()), encoding="utf-8")
+        os.replace(tmp, path)
+    except OSError:
+        pass  # read-only checkout: keep the in-process copy only
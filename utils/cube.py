@@ -0,0 +1,215 @@
+"""Aggregate cube of listing prices.
+
+Cells are the distinct (car, model, body, engType, drive, registration,
+year bucket) combinations of a frame. Each cell keeps the count, sum, min
+and max of price, the index label of its most expensive listing and a
+quantile sketch: counts over log-spaced price buckets whose representative
+values are within :data:`RELATIVE_ACCURACY` of every price they hold (the
+DDSketch layout). Roll-ups to any subset of the dimensions are bincounts
+over a few thousand cells, so top-N, mean-by-brand and box statistics never
+touch the listings. :meth:`PriceCube.update` folds in new listings by
+aggregating just those rows and merging cells.
+"""
+import numpy as np
+import pandas as pd
+
+from utils.caching import VersionedCache
+
+DIMENSIONS = ["car", "model", "body", "engType", "drive", "registration", "year_bucket"]
+YEAR_BUCKET = 5
+RELATIVE_ACCURACY = 0.01
+WHISKER = 1.5  # IQR multiple, as in matplotlib's boxplot
+
+_GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+_LOG_GAMMA = np.log(_GAMMA)
+_BUCKET_BITS = 16
+
+_cubes = VersionedCache()
+
+
+class PriceCube:
+    def __init__(self, cells, sketch):
+        # cells: DIMENSIONS + count, sum, min, max, max_row; one row per cell
+        # sketch: cell, bucket, count; one row per non-empty (cell, bucket)
+        self.cells = cells.reset_index(drop=True)
+        self.sketch = sketch.reset_index(drop=True)
+        self._groups = {}
+        self._leaders = {}
+
+    @classmethod
+    def from_frame(cls, df):
+        keys = pd.DataFrame({dim: _labels(df, dim) for dim in DIMENSIONS})
+        cell = keys.groupby(DIMENSIONS, sort=False).ngroup().to_numpy()
+        cells = keys.drop_duplicates(ignore_index=True)
+        price = df["price"].to_numpy(dtype=np.float64)
+        cells = _reduce(cells, cell, np.ones(len(price), dtype=np.int64), price, price, price, df.index.to_numpy())
+        return cls(cells, _count_buckets(cell, _bucket(price), np.ones(len(price), dtype=np.int64)))
+
+    def merge(self, other):
+        """A new cube holding the listings of both cubes."""
+        both = pd.concat([self.cells, other.cells], ignore_index=True)
+        cell = both.groupby(DIMENSIONS, sort=False).ngroup().to_numpy()
+        cells = _reduce(both[DIMENSIONS].drop_duplicates(ignore_index=True), cell, both["count"].to_numpy(),
+                        both["sum"].to_numpy(), both["min"].to_numpy(), both["max"].to_numpy(),
+                        both["max_row"].to_numpy())
+        remap = np.concatenate([cell[:len(self.cells)][self.sketch["cell"].to_numpy()],
+                                cell[len(self.cells):][other.sketch["cell"].to_numpy()]])
+        buckets = np.concatenate([self.sketch["bucket"].to_numpy(), other.sketch["bucket"].to_numpy()])
+        counts = np.concatenate([self.sketch["count"].to_numpy(), other.sketch["count"].to_numpy()])
+        return PriceCube(cells, _count_buckets(remap, buckets, counts))
+
+    def update(self, df):
+        """Fold the listings in ``df`` into this cube."""
+        merged = self.merge(PriceCube.from_frame(df))
+        self.cells, self.sketch, self._groups, self._leaders = merged.cells, merged.sketch, {}, {}
+
+    def count(self, by):
+        codes, labels = self._group(by)
+        return pd.Series(np.bincount(codes, self.cells["count"].to_numpy(), len(labels)).astype(np.int64),
+                         index=labels, name="count")
+
+    def mean(self, by):
+        """Mean price per group of ``by`` (a dimension or a list of them)."""
+        codes, labels = self._group(by)
+        sums = np.bincount(codes, self.cells["sum"].to_numpy(), len(labels))
+        counts = np.bincount(codes, self.cells["count"].to_numpy(), len(labels))
+        return pd.Series(sums / counts, index=labels, name="price")
+
+    def top(self, n, by=("car", "model")):
+        """The ``n`` most expensive groups of ``by``.
+
+        Returns a frame with the group labels, the group's highest ``price``
+        and ``row``, the index label of the listing that has it.
+        """
+        by = [by] if isinstance(by, str) else list(by)
+        leaders, high = self._leader(by)
+        best = leaders[np.argsort(-high, kind="stable")[:n]]
+        columns = {dim: self.cells[dim].to_numpy()[best] for dim in by}
+        columns["price"] = self.cells["max"].to_numpy()[best]
+        columns["row"] = self.cells["max_row"].to_numpy()[best]
+        return pd.DataFrame(columns)
+
+    def quantiles(self, by, qs):
+        """Approximate price quantiles ``qs`` per group, one column per quantile."""
+        counts, lo, labels = self._histogram(by)
+        values = _quantiles(counts, lo, np.asarray(qs, dtype=np.float64))
+        return pd.DataFrame(values, index=labels, columns=list(qs))
+
+    def box_stats(self, by):
+        """Box-plot statistics per group of ``by``, ready for ``Axes.bxp``.
+
+        Quartiles and whisker ends come from the sketch (within
+        :data:`RELATIVE_ACCURACY`); fliers are one point per occupied bucket
+        beyond the whiskers, with the exact group min and max.
+        """
+        counts, lo, labels = self._histogram(by)
+        codes, _ = self._group(by)
+        n_groups = len(labels)
+        low = np.full(n_groups, np.inf)
+        high = np.full(n_groups, -np.inf)
+        np.minimum.at(low, codes, self.cells["min"].to_numpy())
+        np.maximum.at(high, codes, self.cells["max"].to_numpy())
+
+        q1, med, q3 = _quantiles(counts, lo, np.array([0.25, 0.5, 0.75])).T
+        values = _value(np.arange(lo, lo + counts.shape[1]))
+        stats = []
+        for g, label in enumerate(labels):
+            occupied = np.clip(values[counts[g] > 0], low[g], high[g])
+            iqr = q3[g] - q1[g]
+            inside = occupied[(occupied >= q1[g] - WHISKER * iqr) & (occupied <= q3[g] + WHISKER * iqr)]
+            fliers = occupied[(occupied < q1[g] - WHISKER * iqr) | (occupied > q3[g] + WHISKER * iqr)]
+            stats.append({
+                "label": label,
+                "q1": q1[g], "med": med[g], "q3": q3[g],
+                "whislo": min(inside.min(), q1[g]) if len(inside) else q1[g],
+                "whishi": max(inside.max(), q3[g]) if len(inside) else q3[g],
+                "fliers": fliers,
+            })
+        return stats
+
+    def _group(self, by):
+        by = (by,) if isinstance(by, str) else tuple(by)
+        group = self._groups.get(by)
+        if group is None:
+            if len(by) == 1:
+                codes, labels = pd.factorize(self.cells[by[0]], sort=True)
+                labels = pd.Index(labels, name=by[0])
+            else:
+                codes, labels = pd.MultiIndex.from_frame(self.cells[list(by)]).factorize(sort=True)
+                labels = labels.set_names(by)
+            group = self._groups[by] = (codes, labels)
+        return group
+
+    def _leader(self, by):
+        """The cell holding the most expensive listing of each group, and that price."""
+        key = tuple(by)
+        leader = self._leaders.get(key)
+        if leader is None:
+            codes, _ = self._group(by)
+            high = self.cells["max"].to_numpy()
+            order = np.lexsort((-high, codes))  # ties go to the earlier cell
+            first = order[np.r_[True, codes[order][1:] != codes[order][:-1]]]
+            leader = self._leaders[key] = (first, high[first])
+        return leader
+
+    def _histogram(self, by):
+        """Sketch counts rolled up to ``by``: (groups x buckets, first bucket, labels)."""
+        codes, labels = self._group(by)
+        buckets = self.sketch["bucket"].to_numpy()
+        lo, width = int(buckets.min()), int(buckets.max() - buckets.min()) + 1
+        key = codes[self.sketch["cell"].to_numpy()] * width + (buckets - lo)
+        counts = np.bincount(key, self.sketch["count"].to_numpy(), len(labels) * width)
+        return counts.reshape(len(labels), width), lo, labels
+
+
+def get_cube(dataset, frame="clean"):
+    """The shared cube of ``dataset.<frame>``, built once per snapshot."""
+    return _cubes.get(dataset.fingerprint, frame, lambda: PriceCube.from_frame(getattr(dataset, frame)))
+
+
+def _labels(df, dim):
+    if dim == "year_bucket":
+        return (df["year"].to_numpy(dtype=np.int64) // YEAR_BUCKET) * YEAR_BUCKET
+    return df[dim].astype(str).to_numpy()
+
+
+def _reduce(cells, cell, count, total, low, high, max_row):
+    """Aggregate per-item statistics into one row per ``cell`` id."""
+    n = len(cells)
+    cells["count"] = np.bincount(cell, count, n).astype(np.int64)
+    cells["sum"] = np.bincount(cell, total, n)
+    order = np.lexsort((low, cell))
+    cells["min"] = low[order[np.searchsorted(cell[order], np.arange(n))]]
+    order = np.lexsort((-np.arange(len(cell)), high, cell))  # ties go to the earlier row
+    last = order[np.searchsorted(cell[order], np.arange(n), side="right") - 1]
+    cells["max"] = high[last]
+    cells["max_row"] = max_row[last]
+    return cells
+
+
+def _bucket(price):
+    """Sketch bucket of each price: bucket i holds (gamma^(i-1), gamma^i]; prices below 1 go to bucket 0."""
+    return np.ceil(np.log(np.maximum(price, 1.0)) / _LOG_GAMMA).astype(np.int64)
+
+
+def _value(bucket):
+    """Representative price of a bucket, within RELATIVE_ACCURACY of its contents."""
+    return 2 * _GAMMA ** bucket / (_GAMMA + 1)
+
+
+def _count_buckets(cell, bucket, count):
+    key = (cell.astype(np.int64) << _BUCKET_BITS) | bucket
+    unique, inverse = np.unique(key, return_inverse=True)
+    return pd.DataFrame({
+        "cell": unique >> _BUCKET_BITS,
+        "bucket": unique & ((1 << _BUCKET_BITS) - 1),
+        "count": np.bincount(inverse, count).astype(np.int64),
+    })
+
+
+def _quantiles(counts, lo, qs):
+    """Quantiles of each row of a bucket histogram, as representative prices."""
+    cumulative = np.cumsum(counts, axis=1)
+    ranks = qs[None, :] * (cumulative[:, -1:] - 1)
+    index = np.stack([(cumulative > ranks[:, [j]]).argmax(axis=1) for j in range(len(qs))], axis=1)
+    return _value(lo + index)
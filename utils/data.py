@@ -0,0 +1,169 @@
+"""Loading and cleaning of the car listings dataset.
+
+The CSV is parsed and cleaned once per process and the resulting frames are
+shared by every page and session. Cache entries are keyed on the file's path,
+size and modification time, so replacing ``car_ad_display.csv`` is picked up
+on the next rerun without restarting the server.
+
+Cold starts read the typed columnar snapshot from :mod:`utils.snapshot` and
+only parse the CSV (rebuilding the snapshot) when it is missing or stale.
+"""
+import os
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+
+import pandas as pd
+
+from utils import snapshot
+from utils.categories import CategoryCollapser
+from utils.instrumentation import stage, timed
+from utils.model_registry import MODEL_PATH, get_model
+
+ROOT = Path(__file__).resolve().parent.parent
+DATA_PATH = ROOT / "car_ad_display.csv"
+
+CATEGORY_CUTOFF = 10
+SHORTENED_COLUMNS = ["car", "model"]
+
+# Compact dtypes used for every in-memory copy of the listings. price and engV
+# stay float64: float32 does not hold every listed value exactly.
+CATEGORICAL_COLUMNS = ["car", "body", "engType", "registration", "model", "drive"]
+NUMERIC_DTYPES = {"mileage": "int32", "year": "int16"}
+
+_lock = threading.Lock()
+_datasets = {}
+_encoded = {}
+
+
+@dataclass(frozen=True)
+class Dataset:
+    """The three views of the listings every page works from.
+
+    ``raw`` is the CSV as read, ``complete`` drops rows with missing values and
+    ``clean`` additionally collapses rare brands/models and removes outliers.
+    ``fingerprint`` is the SHA-256 of the source file and identifies the data
+    in downstream caches. One instance per file is shared by every session;
+    when served from the snapshot its columns are read-only memory-mapped
+    views. Pages select and transform into new frames, never assign into
+    these.
+    """
+    raw: pd.DataFrame
+    complete: pd.DataFrame
+    clean: pd.DataFrame
+    fingerprint: str
+
+
+def file_signature(path):
+    """Return ``(resolved path, size, mtime)`` used as a cache key for ``path``."""
+    path = Path(path).resolve()
+    stat = os.stat(path)
+    return str(path), stat.st_size, stat.st_mtime_ns
+
+
+def read_raw(path=DATA_PATH):
+    df = pd.read_csv(path, encoding="ISO-8859-1", sep=";").drop(columns="Unnamed: 0")
+    return compact(df)
+
+
+def compact(df):
+    """Cast listing columns to categoricals and narrow numeric dtypes."""
+    dtypes = {col: "category" for col in CATEGORICAL_COLUMNS if col in df}
+    dtypes.update({col: dtype for col, dtype in NUMERIC_DTYPES.items()
+                   if col in df and not df[col].isna().any()})
+    return df.astype(dtypes)
+
+
+def derive_frames(raw, cutoff=CATEGORY_CUTOFF):
+    """Return the ``raw``, ``complete`` and ``clean`` frames of a parsed CSV."""
+    return {"raw": raw, "complete": raw.dropna(), "clean": clean(raw, cutoff)}
+
+
+def fit_collapsers(df, cutoff=CATEGORY_CUTOFF):
+    """Fit the brand/model collapsers on ``df`` (pass only complete rows)."""
+    return {col: CategoryCollapser(cutoff).fit(df[col]) for col in SHORTENED_COLUMNS}
+
+
+def clean(df, cutoff=CATEGORY_CUTOFF, collapsers=None):
+    """Collapse rare brands/models into ``"Other"`` and drop outlier listings.
+
+    Label frequencies are counted on ``df`` itself unless already fitted
+    ``collapsers`` (see :func:`fit_collapsers`) are passed in.
+    """
+    df = df.dropna()
+    if collapsers is None:
+        collapsers = fit_collapsers(df, cutoff)
+    df = df.assign(**{col: collapsers[col].transform(df[col]) for col in SHORTENED_COLUMNS})
+
+    df = df[(df["price"] <= 100000) & (df["price"] >= 1000)]
+    df = df[(df["mileage"] <= 600) & (df["engV"] <= 7.5)]
+    df = df[df["year"] >= 1975]
+
+    # Categories that no longer occur after filtering would show up as empty bars
+    return df.assign(**{col: df[col].cat.remove_unused_categories()
+                        for col in CATEGORICAL_COLUMNS if isinstance(df[col].dtype, pd.CategoricalDtype)})
+
+
+@timed("load")
+def load_dataset(path=DATA_PATH):
+    """Return the shared :class:`Dataset` for ``path``, parsing it on first use."""
+    key = file_signature(path)
+    dataset = _datasets.get(key)
+    if dataset is None:
+        with _lock:
+            dataset = _datasets.get(key)
+            if dataset is None:
+                dataset = _build_dataset(path, key)
+                _forget(_datasets, key[0])
+                _datasets[key] = dataset
+    return dataset
+
+
+@timed("encode")
+def load_encoded(path=DATA_PATH, model_path=MODEL_PATH):
+    """Return the encoded feature matrix of the cleaned dataset.
+
+    Uses the feature encoder of the model registered for ``model_path``.
+    """
+    dataset = load_dataset(path)
+    bundle = get_model(model_path)
+    key = (file_signature(path), bundle.content_hash)
+    X = _encoded.get(key)
+    if X is None:
+        with _lock:
+            X = _encoded.get(key)
+            if X is None:
+                X = bundle.encoder.transform(dataset.clean)
+                _encoded.clear()
+                _encoded[key] = X
+    return X
+
+
+def _build_dataset(path, signature):
+    with stage("snapshot"):
+        cached = snapshot.load(signature)
+    if cached is not None:
+        frames, meta = cached
+        fingerprint = meta["content_hash"]
+    else:
+        with stage("parse"):
+            raw = read_raw(path)
+        with stage("clean"):
+            frames = derive_frames(raw)
+        fingerprint = snapshot.file_hash(path)
+        try:
+            snapshot.write(signature, frames, fingerprint)
+        except OSError:
+            pass  # read-only checkout: keep serving from the parsed CSV
+        else:
+            # Serve the mapped files so the parsed frames can be freed
+            cached = snapshot.load(signature)
+            if cached is not None:
+                frames = cached[0]
+    return Dataset(fingerprint=fingerprint, **frames)
+
+
+def _forget(cache, path):
+    """Drop cache entries for older versions of ``path``."""
+    for key in [k for k in cache if k[0] == path]:
+        del cache[key]
@@ -0,0 +1,169 @@
+"""Precomputed histogram and KDE summaries of numeric columns.
+
+A :class:`DistributionSummary` keeps fixed-width histogram counts plus a
+fine linearly-binned grid. Its KDE is the FFT convolution of that grid with
+a Gaussian kernel, so drawing costs O(grid log grid) whatever the row count.
+Appending rows only adds counts: the bins keep their width and are extended
+by whole bins when new values fall outside the current range. Bins and grid
+points are numbered from a fixed origin, so extending never moves the edges
+of existing bins.
+"""
+import numpy as np
+
+from utils.caching import VersionedCache
+
+HIST_BINS = 35
+KDE_GRID = 512
+KDE_POINTS = 200  # seaborn's default gridsize
+KERNEL_SIGMAS = 4
+
+_summaries = VersionedCache()
+
+
+class DistributionSummary:
+    def __init__(self, values, bins=HIST_BINS, grid_size=KDE_GRID):
+        values = _finite(values)
+        lo, hi = float(values.min()), float(values.max())
+        if hi == lo:
+            hi = lo + 1.0
+        self.origin = lo
+        self.bin_width = (hi - lo) / bins
+        self.first_bin = 0
+        self.counts = np.zeros(bins, dtype=np.int64)
+        self._on_last_edge = 0
+        self.first_point = 0
+        self.grid_step = (hi - lo) / (grid_size - 1)
+        self.grid = np.zeros(grid_size, dtype=np.float64)
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = lo
+        self.max = hi
+        self._add(values)
+
+    @property
+    def edges(self):
+        return _positions(self.origin, self.bin_width, self.first_bin, len(self.counts) + 1)
+
+    @property
+    def grid_x(self):
+        return _positions(self.origin, self.grid_step, self.first_point, len(self.grid))
+
+    @property
+    def std(self):
+        return np.sqrt(self.m2 / (self.n - 1)) if self.n > 1 else 0.0
+
+    def update(self, values):
+        """Fold newly appended rows into the summary."""
+        values = _finite(values)
+        if len(values) == 0:
+            return self
+        self._extend(float(values.min()), float(values.max()))
+        self._add(values)
+        return self
+
+    def kde(self, points=KDE_POINTS, bw_adjust=1.0):
+        """Return ``(x, density)`` over the observed range, like seaborn with ``cut=0``.
+
+        The bandwidth follows Scott's rule, as ``scipy.stats.gaussian_kde``
+        does by default.
+        """
+        bandwidth = max(self.std * self.n ** (-1 / 5) * bw_adjust, self.grid_step)
+        half = int(np.ceil(KERNEL_SIGMAS * bandwidth / self.grid_step))
+        offsets = np.arange(-half, half + 1) * self.grid_step
+        kernel = np.exp(-0.5 * (offsets / bandwidth) ** 2) / (bandwidth * np.sqrt(2 * np.pi))
+
+        size = len(self.grid) + len(kernel) - 1
+        fft_size = 1 << (size - 1).bit_length()
+        smoothed = np.fft.irfft(np.fft.rfft(self.grid, fft_size) * np.fft.rfft(kernel, fft_size), fft_size)
+        density = smoothed[half:half + len(self.grid)] / self.n
+
+        x = np.linspace(self.min, self.max, points)
+        return x, np.interp(x, self.grid_x, density)
+
+    def plot(self, ax, color="C0"):
+        """Draw the histogram and its KDE line scaled to counts, as histplot does."""
+        edges = self.edges
+        ax.bar(edges[:-1], self.counts, width=self.bin_width, align="edge",
+               color=color, alpha=0.5, edgecolor="white", linewidth=0.5)
+        x, density = self.kde()
+        ax.plot(x, density * self.n * self.bin_width, color=color)
+        ax.set_ylabel("Count")
+
+    def _add(self, values):
+        # Binned against the edges themselves; the last edge belongs to the last bin
+        edges = self.edges
+        index = np.searchsorted(edges, values, side="right") - 1
+        index = np.clip(index, 0, len(self.counts) - 1)
+        # The maximum can sit on (or, rounded, just past) the last edge
+        self._on_last_edge += int(np.count_nonzero(values >= edges[-1]))
+        self.counts += np.bincount(index, minlength=len(self.counts))
+
+        # Linear binning: split each value between its two neighbouring grid points
+        pos = (values - self.origin) / self.grid_step - self.first_point
+        left = np.clip(np.floor(pos).astype(np.int64), 0, len(self.grid) - 2)
+        frac = pos - left
+        self.grid += np.bincount(left, weights=1 - frac, minlength=len(self.grid))
+        self.grid += np.bincount(left + 1, weights=frac, minlength=len(self.grid))
+
+        # Chan et al. parallel update of mean and sum of squared deviations
+        n, mean = len(values), float(values.mean())
+        m2 = float(((values - mean) ** 2).sum())
+        total = self.n + n
+        delta = mean - self.mean
+        self.m2 += m2 + delta ** 2 * self.n * n / total
+        self.mean += delta * n / total
+        self.n = total
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+
+    def _extend(self, lo, hi):
+        """Grow both grids by whole steps so they cover ``[lo, hi]``."""
+        first, bins = self.first_bin, len(self.counts)
+        self.first_bin, self.counts = _extend(
+            self.origin, self.bin_width, self.first_bin, self.counts, lo, hi, bins)
+        last = first - self.first_bin + bins - 1
+        if last < len(self.counts) - 1 and self._on_last_edge:
+            # Values on the old last edge now open the bin above it
+            self.counts[last] -= self._on_last_edge
+            self.counts[last + 1] += self._on_last_edge
+            self._on_last_edge = 0
+        self.first_point, self.grid = _extend(
+            self.origin, self.grid_step, self.first_point, self.grid, lo, hi, len(self.grid) - 1)
+
+
+def _positions(origin, step, first, count):
+    """``count`` positions ``origin + step * i`` for ``i`` from ``first``."""
+    return origin + step * np.arange(first, first + count)
+
+
+def _extend(origin, step, first, cells, lo, hi, span):
+    """Pad ``cells`` with empty cells of width ``step`` until ``[lo, hi]`` is covered.
+
+    Cells are numbered from ``origin``; ``first`` is the number of the first
+    one. ``span`` is how many steps the current cells cover (bins for the
+    histogram, gaps between points for the KDE grid). Returns the new
+    ``(first, cells)``.
+    """
+    start = min(int(np.floor((lo - origin) / step)), first)
+    stop = max(int(np.ceil((hi - origin) / step)), first + span)
+    # The rounded division can land one step short of the exact positions
+    if start < first and _positions(origin, step, start, 1)[0] > lo:
+        start -= 1
+    if stop > first + span and _positions(origin, step, stop, 1)[0] < hi:
+        stop += 1
+    before, after = first - start, stop - (first + span)
+    if before or after:
+        cells = np.concatenate([np.zeros(before, cells.dtype), cells, np.zeros(after, cells.dtype)])
+    return start, cells
+
+
+def get_summary(dataset, column):
+    """The shared summary of ``dataset.clean[column]``, built once per snapshot."""
+    return _summaries.get(dataset.fingerprint, column,
+                          lambda: DistributionSummary(dataset.clean[column].to_numpy()))
+
+
+def _finite(values):
+    values = np.asarray(values, dtype=np.float64)
+    return values[np.isfinite(values)]
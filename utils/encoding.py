@@ -0,0 +1,135 @@
+"""Feature encoding shared by training, prediction and SHAP."""
+import numpy as np
+import pandas as pd
+
+FEATURES = ["car", "body", "mileage", "engV", "engType", "registration", "year", "drive"]
+CATEGORICAL_FEATURES = ["car", "body", "engType", "drive"]
+NUMERIC_FEATURES = ["mileage", "engV", "year"]
+YES_LABELS = ["yes", "YES", "Yes", "y", "Y"]
+
+
+class FeatureEncoder:
+    """Turns listings into the model's numeric feature matrix.
+
+    Each categorical feature has a vocabulary whose positions are the integer
+    codes the model was trained on. Lookups go through a prebuilt hash index,
+    so encoding a frame costs one ``get_indexer`` per column. Labels outside the
+    vocabulary fall back to the column's "other" bucket when it has one, and
+    are reported as unencodable otherwise. Missing values never fall back;
+    they are reported as unencodable. Registration becomes a 0/1 flag.
+    """
+
+    def __init__(self, vocabularies, yes_labels=YES_LABELS):
+        self.vocabularies = {col: list(vocab) for col, vocab in vocabularies.items()}
+        self.yes_labels = list(yes_labels)
+        self._index = {col: pd.Index(vocab) for col, vocab in self.vocabularies.items()}
+        self._lookup = {col: {label: code for code, label in enumerate(vocab)}
+                        for col, vocab in self.vocabularies.items()}
+        self._other = {col: _other_code(vocab) for col, vocab in self.vocabularies.items()}
+        self._yes = frozenset(self.yes_labels)
+
+    @classmethod
+    def fit(cls, df):
+        """Build vocabularies from the sorted labels of a training frame."""
+        return cls({col: sorted(pd.unique(df[col].dropna())) for col in CATEGORICAL_FEATURES})
+
+    @classmethod
+    def from_label_encoders(cls, encoders):
+        """Adopt the classes of fitted ``sklearn`` ``LabelEncoder`` objects."""
+        return cls({col: encoders[col].classes_.tolist() for col in CATEGORICAL_FEATURES})
+
+    def to_dict(self):
+        return {"vocabularies": self.vocabularies, "yes_labels": self.yes_labels}
+
+    @classmethod
+    def from_dict(cls, state):
+        return cls(state["vocabularies"], state["yes_labels"])
+
+    def encode(self, df):
+        """Encode every row of ``df``.
+
+        Returns ``(X, errors)``: a float64 array in ``FEATURES`` order and an
+        object array holding, per row, why it cannot be predicted ("" if it
+        can).
+        """
+        n = len(df)
+        X = np.empty((n, len(FEATURES)), dtype=np.float64)
+        problems = []
+        for j, col in enumerate(FEATURES):
+            if col in self.vocabularies:
+                missing = df[col].isna().to_numpy()
+                codes = self._codes(col, df[col], missing)
+                X[:, j] = codes
+                if missing.any():
+                    problems.append(pd.Series(f"missing {col}", index=np.flatnonzero(missing)))
+                bad, reason = (codes < 0) & ~missing, f"unseen {col}"
+            elif col == "registration":
+                X[:, j] = df[col].isin(self.yes_labels)
+                bad, reason = df[col].isna().to_numpy(), f"missing {col}"
+            else:
+                values = pd.to_numeric(df[col], errors="coerce").to_numpy(dtype=np.float64)
+                X[:, j] = values
+                bad, reason = np.isnan(values), f"invalid {col}"
+            if bad.any():
+                problems.append(pd.Series(reason, index=np.flatnonzero(bad)))
+
+        errors = np.full(n, "", dtype=object)
+        if problems:
+            joined = pd.concat(problems).groupby(level=0).agg("; ".join)
+            errors[joined.index] = joined.to_numpy()
+        return X, errors
+
+    def transform(self, df):
+        """Return the encoded features of ``df`` as a DataFrame on ``df``'s index.
+
+        Raises ``ValueError`` if any row holds a label with no fallback.
+        """
+        X, errors = self.encode(df)
+        if (errors != "").any():
+            raise ValueError(f"Cannot encode {int((errors != '').sum())} rows: {errors[errors != ''][0]}")
+        frame = pd.DataFrame(X, index=df.index, columns=FEATURES)
+        integer = CATEGORICAL_FEATURES + ["registration"] + [
+            col for col in NUMERIC_FEATURES if pd.api.types.is_integer_dtype(df[col].dtype)]
+        return frame.astype({col: "int64" for col in integer})
+
+    def transform_row(self, listing):
+        """Encode one listing given as a mapping.
+
+        Returns ``None`` if it cannot be encoded: a feature is missing, or a
+        label is unseen in a column without an "other" bucket.
+        """
+        row = []
+        for col in FEATURES:
+            value = listing.get(col)
+            if value is None or pd.isna(value):
+                return None
+            if col in self._lookup:
+                code = self._lookup[col].get(value, self._other[col])
+                if code < 0:
+                    return None
+                row.append(code)
+            elif col == "registration":
+                row.append(1 if value in self._yes else 0)
+            else:
+                row.append(value)
+        return row
+
+    def _codes(self, col, values, missing):
+        """Vocabulary codes of ``values``; -1 where ``missing`` or unseen without fallback."""
+        index, other = self._index[col], self._other[col]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            # Look up each category once, then gather by the existing codes
+            lookup = np.append(index.get_indexer(values.cat.categories), -1)
+            codes = lookup[values.cat.codes.to_numpy()]
+        else:
+            codes = index.get_indexer(values)
+        codes[(codes < 0) & ~missing] = other
+        return codes
+
+
+def _other_code(vocabulary):
+    """Code of the catch-all label ("Other"/"other"), or -1 without one."""
+    for code, label in enumerate(vocabulary):
+        if isinstance(label, str) and label.lower() == "other":
+            return code
+    return -1
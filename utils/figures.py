@@ -0,0 +1,91 @@
+"""Rendering of matplotlib charts to cached image bytes.
+
+:func:`render` keys each chart on the dataset fingerprint plus a chart spec,
+keeps the encoded PNG in a process-wide LRU bounded by total bytes, and
+always closes the figure it drew.
+
+matplotlib and seaborn are only imported when a chart is actually drawn, so
+pages whose charts are all cached never pay for the imports.
+"""
+import io
+import threading
+from collections import OrderedDict
+
+import streamlit as st
+
+from utils.instrumentation import timed
+
+MAX_BYTES = 64 * 2**20
+SAVEFIG_KWARGS = {"format": "png", "dpi": 200, "bbox_inches": "tight"}  # st.pyplot's defaults
+STYLE = "whitegrid"
+
+
+class FigureCache:
+    def __init__(self, max_bytes=MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+            return data
+
+    def put(self, key, data):
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = data
+            self._size += len(data)
+            while self._size > self.max_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def stats(self):
+        return {"entries": len(self._entries), "bytes": self._size, "max_bytes": self.max_bytes,
+                "hits": self.hits, "misses": self.misses}
+
+
+figure_cache = FigureCache()
+
+
+def render(key, draw):
+    """Return PNG bytes for the chart identified by ``key``.
+
+    ``key`` must be hashable and include everything the chart depends on
+    (normally the dataset fingerprint and the chart's parameters). ``draw``
+    is only called on a miss, as ``draw(plt, sns)`` with ``matplotlib.pyplot``
+    and ``seaborn``; it must create and return a matplotlib figure, which is
+    closed once encoded. If ``draw`` raises, the current figure is closed.
+    """
+    data = figure_cache.get(key)
+    if data is None:
+        import matplotlib.pyplot as plt
+        import seaborn as sns
+
+        sns.set_style(STYLE)
+        fig = None
+        try:
+            fig = draw(plt, sns)
+            buffer = io.BytesIO()
+            fig.savefig(buffer, **SAVEFIG_KWARGS)
+            data = buffer.getvalue()
+        finally:
+            # A draw that raised leaves its figure current
+            plt.close(plt.gcf() if fig is None else fig)
+        figure_cache.put(key, data)
+    return data
+
+
+@timed("render")
+def show(key, draw):
+    """Display the cached chart for ``key`` like ``st.pyplot`` would."""
+    st.image(render(key, draw), width="stretch")
@@ -0,0 +1,83 @@
+"""Chunked, bounded-memory cleaning of large listing files.
+
+Reads ``car_ad_display.csv``-format files in chunks of ``chunksize`` rows and
+applies the same cleaning as :func:`utils.data.clean`. Rows keep the file's
+id column as their index and the values exactly as listed; the compact
+in-memory dtypes of :func:`utils.data.compact` are not applied. A first
+pass counts brand and model frequencies over the complete rows of the whole
+file, so the "Other" collapsing matches a full in-memory clean exactly. The
+second pass cleans chunk by chunk and writes each one out as soon as it is
+ready. Peak memory is set by the chunk size plus the label counts, not by
+the file size.
+
+    python -m utils.ingest listings.csv listings_clean.csv --chunksize 200000
+"""
+import argparse
+
+import pandas as pd
+
+from utils.categories import CategoryCollapser
+from utils.data import CATEGORY_CUTOFF, DATA_PATH, SHORTENED_COLUMNS, clean
+
+CHUNK_SIZE = 100_000
+CSV_OPTIONS = {"encoding": "ISO-8859-1", "sep": ";"}
+
+
+def iter_raw_chunks(path=DATA_PATH, chunksize=CHUNK_SIZE):
+    """Yield raw chunks indexed by the file's id column."""
+    with pd.read_csv(path, chunksize=chunksize, index_col=0, float_precision="round_trip",
+                     **CSV_OPTIONS) as reader:
+        yield from reader
+
+
+def count_labels(path=DATA_PATH, chunksize=CHUNK_SIZE, columns=SHORTENED_COLUMNS):
+    """First pass: label frequencies over the complete rows of the whole file."""
+    counts = {col: pd.Series(dtype="int64") for col in columns}
+    for chunk in iter_raw_chunks(path, chunksize):
+        chunk = chunk.dropna()
+        for col in columns:
+            counts[col] = counts[col].add(chunk[col].value_counts(), fill_value=0)
+    return {col: c.astype("int64") for col, c in counts.items()}
+
+
+def fit_collapsers(path=DATA_PATH, chunksize=CHUNK_SIZE, cutoff=CATEGORY_CUTOFF):
+    return {col: CategoryCollapser.from_counts(counts, cutoff)
+            for col, counts in count_labels(path, chunksize).items()}
+
+
+def iter_clean_chunks(path=DATA_PATH, chunksize=CHUNK_SIZE, cutoff=CATEGORY_CUTOFF):
+    """Yield ``(raw_rows, cleaned)`` per chunk; the cleaned chunks together
+    hold the rows and labels of ``clean(read_raw(path))``."""
+    collapsers = fit_collapsers(path, chunksize, cutoff)
+    for chunk in iter_raw_chunks(path, chunksize):
+        yield len(chunk), clean(chunk, cutoff, collapsers)
+
+
+def write_clean(path, out_path, chunksize=CHUNK_SIZE, cutoff=CATEGORY_CUTOFF):
+    """Stream the cleaned rows of ``path`` into ``out_path`` in the same CSV format.
+
+    Returns ``(rows_read, rows_written)``.
+    """
+    rows_read = rows_written = 0
+    with open(out_path, "w", encoding=CSV_OPTIONS["encoding"], newline="") as out:
+        for raw_rows, cleaned in iter_clean_chunks(path, chunksize, cutoff):
+            cleaned.to_csv(out, sep=CSV_OPTIONS["sep"], header=rows_read == 0)
+            rows_read += raw_rows
+            rows_written += len(cleaned)
+    return rows_read, rows_written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Clean a listings CSV in bounded memory")
+    parser.add_argument("source")
+    parser.add_argument("target")
+    parser.add_argument("--chunksize", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--cutoff", type=int, default=CATEGORY_CUTOFF)
+    args = parser.parse_args(argv)
+
+    rows_read, rows_written = write_clean(args.source, args.target, args.chunksize, args.cutoff)
+    print(f"Read {rows_read} rows, wrote {rows_written} cleaned rows to {args.target}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""Per-stage timing of page reruns.
+
+Wrap work in ``with stage("load"):`` (or decorate with ``@timed("load")``)
+to record wall time, CPU time of the running thread and the change in
+process RSS. Stages nest, so a clean inside a load is recorded as
+``load/clean``. Pages call :func:`begin_run` at the top and
+:func:`diagnostics_panel` at the bottom, and each rerun's records are
+attributed to that rerun.
+
+Environment variables:
+
+``CARPRICE_DIAGNOSTICS=1``
+    Always show the sidebar panel (otherwise add ``?diagnostics=1`` to the URL).
+``CARPRICE_METRICS_JSONL=path``
+    Append every stage record to this JSON-lines file.
+``CARPRICE_METRICS_PROM=path``
+    Keep a Prometheus textfile-collector file with per-stage totals.
+``CARPRICE_PROFILE=1``
+    Profile each rerun with cProfile (dumped to ``.cache/profiles``) and add
+    the tracemalloc allocation peak of each stage to its record.
+"""
+import cProfile
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+PROFILE_DIR = ROOT / ".cache" / "profiles"
+
+PROFILE = os.environ.get("CARPRICE_PROFILE") == "1"
+JSONL_PATH = os.environ.get("CARPRICE_METRICS_JSONL")
+PROM_PATH = os.environ.get("CARPRICE_METRICS_PROM")
+
+PROMETHEUS_METRICS = (
+    ("carprice_stage_runs_total", "Executions of an instrumented stage."),
+    ("carprice_stage_wall_seconds_total", "Wall time spent in a stage."),
+    ("carprice_stage_cpu_seconds_total", "Thread CPU time spent in a stage."),
+)
+
+_local = threading.local()
+_totals_lock = threading.Lock()
+_totals = {}
+
+if PROFILE and not tracemalloc.is_tracing():
+    tracemalloc.start()
+
+
+class _Run:
+    def __init__(self, page):
+        self.page = page
+        self.started = time.time()
+        self.records = []
+        self.stack = []
+        self.profiler = None
+
+
+def begin_run(page):
+    """Start collecting stage records for one rerun of ``page`` on this thread."""
+    if getattr(_local, "run", None) is not None:
+        end_run()  # previous rerun stopped early (st.stop)
+    run = _local.run = _Run(page)
+    if PROFILE:
+        run.profiler = cProfile.Profile()
+        run.profiler.enable()
+    return run
+
+
+@contextmanager
+def stage(name):
+    """Record the wall time, thread CPU time and RSS change of the block."""
+    run = getattr(_local, "run", None)
+    stack = run.stack if run is not None else _orphan_stack()
+    stack.append(name)
+    if PROFILE:
+        tracemalloc.reset_peak()
+        traced_before = tracemalloc.get_traced_memory()[0]
+    rss_before = rss_bytes()
+    cpu_before = time.thread_time()
+    wall_before = time.perf_counter()
+    try:
+        yield
+    finally:
+        record = {
+            "page": run.page if run is not None else None,
+            "stage": "/".join(stack),
+            "wall_ms": (time.perf_counter() - wall_before) * 1000,
+            "cpu_ms": (time.thread_time() - cpu_before) * 1000,
+            "rss_delta_kb": (rss_bytes() - rss_before) / 1024,
+            "timestamp": time.time(),
+        }
+        if PROFILE:
+            record["alloc_peak_kb"] = (tracemalloc.get_traced_memory()[1] - traced_before) / 1024
+        stack.pop()
+        if run is not None:
+            run.records.append(record)
+        else:
+            _emit([record])
+
+
+def timed(name):
+    """Decorator form of :func:`stage`."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def end_run():
+    """Finish the current rerun: flush its records to the sinks and return them."""
+    run = getattr(_local, "run", None)
+    _local.run = None
+    if run is None:
+        return []
+    if run.profiler is not None:
+        run.profiler.disable()
+        try:
+            PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+            name = "".join(c if c.isalnum() else "_" for c in run.page)
+            run.profiler.dump_stats(PROFILE_DIR / f"{name}-{int(run.started * 1000)}.prof")
+        except OSError:
+            pass
+    _emit(run.records)
+    return run.records
+
+
+def diagnostics_panel():
+    """End the rerun and, when enabled, show its stage timings in the sidebar."""
+    import streamlit as st
+
+    records = end_run()
+    if os.environ.get("CARPRICE_DIAGNOSTICS") != "1" and st.query_params.get("diagnostics") != "1":
+        return
+    with st.sidebar.expander("⏱ Diagnostics", expanded=True):
+        if not records:
+            st.write("No stages recorded in this rerun.")
+            return
+        top_level = [r for r in records if "/" not in r["stage"]]
+        st.metric("Instrumented time", f"{sum(r['wall_ms'] for r in top_level):.1f} ms")
+        st.dataframe(
+            [{k: (round(v, 2) if isinstance(v, float) else v) for k, v in r.items()
+              if k not in ("page", "timestamp")} for r in records],
+            hide_index=True,
+        )
+        if PROFILE:
+            st.caption(f"cProfile output: {PROFILE_DIR}")
+
+
+def rss_bytes():
+    """Current resident set size of the process, or 0 where /proc is unavailable."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def _orphan_stack():
+    # Stages outside a page run (e.g. a background thread) still nest correctly
+    if not hasattr(_local, "stack"):
+        _local.stack = []
+    return _local.stack
+
+
+def _emit(records):
+    if not records:
+        return
+    if JSONL_PATH:
+        try:
+            with open(JSONL_PATH, "a", encoding="utf-8") as f:
+                f.writelines(json.dumps(r) + "\n" for r in records)
+        except OSError:
+            pass
+    if PROM_PATH:
+        with _totals_lock:
+            for r in records:
+                totals = _totals.setdefault((r["page"] or "", r["stage"]), [0, 0.0, 0.0])
+                totals[0] += 1
+                totals[1] += r["wall_ms"] / 1000
+                totals[2] += r["cpu_ms"] / 1000
+            _write_prometheus()
+
+
+def _write_prometheus():
+    lines = []
+    for index, (metric, help_text) in enumerate(PROMETHEUS_METRICS):
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} counter")
+        for (page, name), totals in sorted(_totals.items()):
+            value = totals[index]
+            value = f"{value:.6f}" if isinstance(value, float) else value
+            lines.append(f'{metric}{{page="{page}",stage="{name}"}} {value}')
+    tmp = f"{PROM_PATH}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp, PROM_PATH)
+    except OSError:
+        pass
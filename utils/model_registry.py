@@ -0,0 +1,193 @@
+"""Process-wide registry for the trained model artifact.
+
+The model ships as a versioned artifact directory (see :mod:`utils.artifact`),
+which is its only source of truth: the registry validates the manifest and
+takes the content hash from it, and the booster and encoder are only parsed
+when first used, so pages that need nothing but the encoder never import
+LightGBM.
+
+The model is loaded once per process and every caller gets the same
+:class:`ModelBundle`. The manifest is re-read only when its size or mtime
+changes, and the bundle is replaced only when the content hash differs.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from utils import artifact
+from utils.instrumentation import timed
+
+ROOT = Path(__file__).resolve().parent.parent
+MODEL_PATH = ROOT / "model"
+
+# A session counts as active while it has used the model within SESSION_TTL
+# seconds; at most MAX_SESSIONS ids are tracked per artifact.
+SESSION_TTL = 30 * 60
+MAX_SESSIONS = 10_000
+
+
+class ModelBundle:
+    """The loaded artifact. Shared by all sessions: treat it as read-only.
+
+    ``model`` and ``encoder`` are parsed on first access; ``load_seconds``
+    records what each component cost.
+    """
+
+    def __init__(self, content_hash, path, manifest):
+        self.content_hash = content_hash
+        self.path = path
+        self.manifest = manifest
+        self.load_seconds = {}
+        self._model = None
+        self._encoder = None
+        self._lock = threading.Lock()
+
+    @property
+    def model(self):
+        if self._model is None:
+            return self._load("model", artifact.load_model)
+        return self._model
+
+    @property
+    def encoder(self):
+        if self._encoder is None:
+            return self._load("encoder", artifact.load_encoder)
+        return self._encoder
+
+    def load_all(self):
+        """Parse every component now instead of on first access."""
+        self._load("model", artifact.load_model)
+        self._load("encoder", artifact.load_encoder)
+        return self
+
+    def _load(self, name, loader):
+        with self._lock:
+            current = getattr(self, f"_{name}")
+            if current is not None:
+                return current
+            start = time.perf_counter()
+            component = loader(self.path, self.manifest)
+            self.load_seconds[name] = time.perf_counter() - start
+            setattr(self, f"_{name}", component)
+            return component
+
+
+@dataclass
+class _Entry:
+    bundle: ModelBundle
+    signature: tuple
+    load_seconds: float
+    file_bytes: int
+    loaded_at: float
+    hits: int = 0
+    sessions: OrderedDict = field(default_factory=OrderedDict)  # session id -> last use
+
+
+_lock = threading.Lock()
+_sessions_lock = threading.Lock()
+_entries = {}
+_loads = 0
+
+
+@timed("model")
+def get_model(path=MODEL_PATH):
+    """Return the shared :class:`ModelBundle` for ``path``."""
+    path = str(Path(path).resolve())
+    stat = os.stat(Path(path) / artifact.MANIFEST)
+    signature = (stat.st_size, stat.st_mtime_ns)
+
+    entry = _entries.get(path)
+    if entry is None or entry.signature != signature:
+        with _lock:
+            entry = _entries.get(path)
+            if entry is None or entry.signature != signature:
+                entry = _refresh(path, signature, entry)
+
+    entry.hits += 1
+    session = _session_id()
+    if session is not None:
+        _touch(entry.sessions, session)
+    return entry.bundle
+
+
+def _touch(sessions, session):
+    now = time.monotonic()
+    with _sessions_lock:
+        sessions[session] = now
+        sessions.move_to_end(session)
+        _expire(sessions, now)
+
+
+def _expire(sessions, now):
+    """Drop sessions idle for longer than SESSION_TTL, and the oldest beyond MAX_SESSIONS."""
+    while sessions and (len(sessions) > MAX_SESSIONS or now - next(iter(sessions.values())) > SESSION_TTL):
+        sessions.popitem(last=False)
+
+
+def _refresh(path, signature, entry):
+    start = time.perf_counter()
+    manifest = artifact.read_manifest(path)
+    content_hash = manifest["content_hash"]
+    if entry is not None and entry.bundle.content_hash == content_hash:
+        entry.signature = signature  # touched but unchanged
+        return entry
+
+    global _loads
+    bundle = ModelBundle(content_hash, path, manifest)
+    file_bytes = sum(os.path.getsize(os.path.join(path, name)) for name in [artifact.MANIFEST, *manifest["files"]])
+    load_seconds = time.perf_counter() - start
+    _loads += 1
+
+    entry = _Entry(
+        bundle=bundle,
+        signature=signature,
+        load_seconds=load_seconds,
+        file_bytes=file_bytes,
+        loaded_at=time.time(),
+    )
+    _entries[path] = entry
+    return entry
+
+
+def registry_stats():
+    """Load metrics for every artifact in the registry.
+
+    ``active_sessions`` counts sessions that used the model within
+    ``SESSION_TTL``. ``estimated_file_bytes_saved`` is the artifact's size on
+    disk times the number of additional active sessions that would otherwise
+    have loaded their own copy. It is a size-on-disk estimate, not memory:
+    ``python -m benchmarks.bench_artifact`` measures the resident size of a
+    loaded copy. Lazily loaded components are listed separately in
+    ``component_seconds``; the booster's includes importing lightgbm.
+    """
+    stats = []
+    for path, entry in list(_entries.items()):
+        bundle = entry.bundle
+        with _sessions_lock:
+            _expire(entry.sessions, time.monotonic())
+            sessions = len(entry.sessions)
+        stats.append({
+            "path": path,
+            "content_hash": bundle.content_hash,
+            "load_seconds": entry.load_seconds,
+            "component_seconds": dict(bundle.load_seconds),
+            "file_bytes": entry.file_bytes,
+            "loaded_at": entry.loaded_at,
+            "hits": entry.hits,
+            "active_sessions": sessions,
+            "estimated_file_bytes_saved": entry.file_bytes * max(sessions - 1, 0),
+            "process_loads": _loads,
+        })
+    return stats
+
+
+def _session_id():
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+    except ImportError:
+        return None
+    ctx = get_script_run_ctx(suppress_warning=True)
+    return ctx.session_id if ctx is not None else None
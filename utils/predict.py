@@ -0,0 +1,86 @@
+"""Vectorized batch prediction for uploaded listings."""
+import hashlib
+import io
+
+import numpy as np
+import pandas as pd
+
+from utils.caching import VersionedCache
+from utils.encoding import FEATURES
+from utils.instrumentation import timed
+
+CHUNK_SIZE = 50_000
+MAX_CACHED_UPLOADS = 8
+
+_uploads = VersionedCache(max_entries=MAX_CACHED_UPLOADS)
+
+
+def read_listings(buffer):
+    """Read an uploaded CSV, accepting ``;`` or ``,`` separated files.
+
+    The separator is taken from the header line, and files that are not
+    valid UTF-8 are decoded as ISO-8859-1 like ``car_ad_display.csv``.
+    Raises ``ValueError`` if the file is empty or cannot be parsed.
+    """
+    raw = buffer.read() if hasattr(buffer, "read") else buffer
+    try:
+        text = raw.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        text = raw.decode("ISO-8859-1")
+    header = text.split("\n", 1)[0]
+    sep = ";" if header.count(";") > header.count(",") else ","
+    try:
+        df = pd.read_csv(io.StringIO(text), sep=sep)
+    except (pd.errors.EmptyDataError, pd.errors.ParserError) as exc:
+        raise ValueError(f"not a readable CSV file ({exc})") from exc
+    return df.drop(columns=[c for c in df.columns if c.startswith("Unnamed: ")])
+
+
+def missing_columns(df):
+    return [col for col in FEATURES if col not in df.columns]
+
+
+@timed("predict")
+def predict_batch(df, bundle, chunk_size=CHUNK_SIZE, progress=None):
+    """Price every row of ``df`` with the model in ``bundle``.
+
+    Rows are predicted in chunks of ``chunk_size`` and ``progress`` (if
+    given) is called with the fraction done after each chunk. The result is
+    ``df`` with ``predicted_price`` and ``error`` columns appended; rows that
+    could not be encoded get a NaN price and the reason in ``error``.
+    Unseen brands, bodies and engine types are priced as "Other".
+    """
+    X, errors = bundle.encoder.encode(df)
+    valid = np.flatnonzero(errors == "")
+    prices = np.full(len(df), np.nan)
+
+    for start in range(0, len(valid), chunk_size):
+        rows = valid[start:start + chunk_size]
+        chunk = pd.DataFrame(X[rows], columns=FEATURES)
+        prices[rows] = bundle.model.predict(chunk)
+        if progress is not None:
+            progress(min((start + chunk_size) / len(valid), 1.0))
+    if progress is not None:
+        progress(1.0)
+
+    return df.assign(predicted_price=prices, error=errors)
+
+
+def predict_upload(raw, bundle, progress=None):
+    """Read and price the uploaded file ``raw`` (bytes) once per model.
+
+    Returns ``(missing, result)``: the required columns the file lacks, and
+    the :func:`predict_batch` result when none are missing. Results are
+    cached on the file's SHA-256 and the model's content hash, so page
+    reruns while the file stays uploaded do not price it again; on a hit
+    ``progress`` is not called. Raises ``ValueError`` like
+    :func:`read_listings`.
+    """
+    def build():
+        listings = read_listings(raw)
+        missing = missing_columns(listings)
+        if missing:
+            return missing, None
+        return [], predict_batch(listings, bundle, progress=progress)
+
+    return _uploads.get(bundle.content_hash, hashlib.sha256(raw).hexdigest(), build)
@@ -0,0 +1,73 @@
+"""Process-wide cache of single-listing price predictions.
+
+Every Price Predictor input is discrete, so users keep asking for the same
+configurations. Predictions are cached in a bounded LRU with a TTL, shared
+by all sessions. The key is the model hash plus the encoded feature row, so
+equivalent inputs (e.g. two unseen brands that both map to "Other") share an
+entry. The cache empties itself when a different model artifact is seen.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from utils.instrumentation import timed
+
+MAX_ENTRIES = 4096
+TTL_SECONDS = 3600
+
+
+class PredictionCache:
+    def __init__(self, max_entries=MAX_ENTRIES, ttl=TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._model_hash = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @timed("predict")
+    def predict(self, bundle, row):
+        """Return the model's price for the encoded feature ``row``."""
+        key = tuple(float(v) for v in row)
+        now = time.monotonic()
+        with self._lock:
+            if bundle.content_hash != self._model_hash:
+                if self._entries:
+                    self.invalidations += 1
+                self._entries.clear()
+                self._model_hash = bundle.content_hash
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[1] < self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        price = float(bundle.model.predict([list(row)])[0])
+        with self._lock:
+            if bundle.content_hash == self._model_hash:
+                self._entries[key] = (price, now)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return price
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+prediction_cache = PredictionCache()
@@ -0,0 +1,121 @@
+"""Row indexes for interactive filtering of the listings.
+
+A :class:`RowIndex` is built once per dataset and holds:
+
+* per-category posting lists (row positions, in order) and the category
+  code of every row for each categorical column;
+* the argsort order and sorted values of each numeric column.
+
+:meth:`RowIndex.select` sizes every predicate up front (category counts, or
+two binary searches for a range), expands only the most selective one into
+row positions and tests the rest on those rows alone, so the cost follows
+the size of the result rather than of the dataset.
+"""
+import numpy as np
+import pandas as pd
+
+from utils.caching import VersionedCache
+
+FILTER_CATEGORIES = ["car", "body"]
+FILTER_RANGES = ["year", "price"]
+
+_indexes = VersionedCache()
+
+
+class RowIndex:
+    def __init__(self, df, categorical=FILTER_CATEGORIES, numeric=FILTER_RANGES):
+        self.n = len(df)
+        self._labels = {}
+        self._offsets = {}
+        self._postings = {}
+        self._codes = {}
+        for col in categorical:
+            codes, labels = pd.factorize(df[col], sort=True)
+            order = np.argsort(codes, kind="stable")
+            counts = np.bincount(codes[codes >= 0], minlength=len(labels))
+            self._labels[col] = {label: code for code, label in enumerate(labels)}
+            self._offsets[col] = np.concatenate([[0], np.cumsum(counts)])
+            self._postings[col] = order[len(order) - counts.sum():]  # missing values sort first
+            self._codes[col] = codes.astype(np.int32)
+
+        self._values = {}
+        self._order = {}
+        self._sorted = {}
+        for col in numeric:
+            values = df[col].to_numpy()
+            order = np.argsort(values, kind="stable")
+            self._values[col] = values
+            self._order[col] = order
+            self._sorted[col] = values[order]
+
+    def labels(self, column):
+        return list(self._labels[column])
+
+    def bounds(self, column):
+        values = self._sorted[column]
+        return values[0].item(), values[-1].item()
+
+    def select(self, categories=None, ranges=None):
+        """Sorted positions of the rows matching every predicate.
+
+        ``categories`` maps a column to the labels to keep (empty keeps all);
+        ``ranges`` maps a column to an inclusive ``(low, high)``. Returns
+        ``None`` when no predicate excludes anything.
+        """
+        predicates = []
+        for col, labels in (categories or {}).items():
+            codes = [self._labels[col][label] for label in labels if label in self._labels[col]]
+            if labels:
+                offsets = self._offsets[col]
+                predicates.append((int(sum(offsets[c + 1] - offsets[c] for c in codes)), "category", col, codes))
+        for col, (low, high) in (ranges or {}).items():
+            start = np.searchsorted(self._sorted[col], low, side="left")
+            stop = np.searchsorted(self._sorted[col], high, side="right")
+            if stop - start < self.n:
+                predicates.append((int(stop - start), "range", col, (start, stop, low, high)))
+        if not predicates:
+            return None
+
+        predicates.sort(key=lambda p: p[0])
+        _, kind, col, arg = predicates[0]
+        if kind == "category":
+            offsets, postings = self._offsets[col], self._postings[col]
+            rows = np.concatenate([postings[offsets[c]:offsets[c + 1]] for c in arg] or [np.empty(0, np.int64)])
+        else:
+            rows = self._order[col][arg[0]:arg[1]]
+
+        for _, kind, col, arg in predicates[1:]:
+            if not len(rows):
+                break
+            if kind == "category":
+                rows = rows[np.isin(self._codes[col][rows], arg)]
+            else:
+                values = self._values[col][rows]
+                rows = rows[(values >= arg[2]) & (values <= arg[3])]
+        return np.sort(rows)
+
+
+def take(df, rows):
+    """The rows of ``df`` at ``rows``, with categories no longer present dropped."""
+    subset = df.take(rows)
+    for col in subset.columns:
+        if isinstance(subset[col].dtype, pd.CategoricalDtype):
+            subset[col] = subset[col].cat.remove_unused_categories()
+    return subset
+
+
+def get_row_index(dataset):
+    """The shared index of ``dataset.complete``, built once per snapshot.
+
+    Also returns, for each position of ``complete``, the position of the
+    same listing in ``clean`` (-1 if it was cleaned away), so one selection
+    filters both frames.
+    """
+    return _indexes.get(dataset.fingerprint, None, lambda: _build_index(dataset))
+
+
+def _build_index(dataset):
+    clean_position = np.full(len(dataset.complete), -1, dtype=np.int64)
+    found = dataset.complete.index.get_indexer(dataset.clean.index)
+    clean_position[found[found >= 0]] = np.flatnonzero(found >= 0)
+    return RowIndex(dataset.complete), clean_position
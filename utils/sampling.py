@@ -0,0 +1,91 @@
+"""Stratified row samples for the global SHAP plots.
+
+The plots are drawn from a sample stratified by brand and price decile, and
+the mean absolute SHAP value of each feature is reported as a stratified
+estimate with its standard error. A budget of at least the number of rows
+gives the exact values.
+"""
+import numpy as np
+import pandas as pd
+
+PRICE_BINS = 10
+MIN_PER_STRATUM = 2
+
+
+def strata(df, by="car", value="price", bins=PRICE_BINS):
+    """Stratum id of each row of ``df``: the ``by`` label crossed with the ``value`` quantile bin."""
+    group = pd.factorize(df[by], use_na_sentinel=False)[0]
+    decile = pd.qcut(df[value], bins, labels=False, duplicates="drop").to_numpy()
+    return group * bins + decile
+
+
+def allocate(sizes, budget):
+    """Rows to draw from each stratum for a total of ``budget``.
+
+    Proportional allocation (largest remainder), with at least
+    :data:`MIN_PER_STRATUM` rows per stratum when the budget allows so that
+    every stratum's variance can be estimated.
+    """
+    sizes = np.asarray(sizes)
+    floor = np.minimum(sizes, MIN_PER_STRATUM)
+    if budget < floor.sum():
+        floor = np.zeros_like(sizes)
+    spare = sizes - floor
+    share = (budget - floor.sum()) * spare / max(spare.sum(), 1)
+    counts = floor + np.floor(share).astype(np.int64)
+    remainder = int(budget - counts.sum())
+    if remainder > 0:
+        counts[np.argsort(np.floor(share) - share, kind="stable")[:remainder]] += 1
+    return np.minimum(counts, sizes)
+
+
+def stratified_sample(row_strata, budget, seed=0):
+    """Sorted positions of a stratified random sample of about ``budget`` rows."""
+    row_strata = np.asarray(row_strata)
+    n = len(row_strata)
+    if budget >= n:
+        return np.arange(n)
+    _, inverse, sizes = np.unique(row_strata, return_inverse=True, return_counts=True)
+    counts = allocate(sizes, budget)
+
+    # Shuffle within strata, then keep the first counts[h] rows of each
+    order = np.lexsort((np.random.default_rng(seed).random(n), inverse))
+    rank = np.empty(n, dtype=np.int64)
+    rank[order] = np.arange(n) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+    return np.flatnonzero(rank < counts[inverse])
+
+
+def mean_abs_shap(values, row_strata, positions, feature_names):
+    """Stratified estimate of the mean |SHAP| of each feature from the rows at ``positions``.
+
+    Returns a DataFrame indexed by feature with ``mean_abs`` and
+    ``std_error`` (with finite population correction, so a full sample has
+    zero error), sorted by ``mean_abs``. Strata with a single sampled row
+    borrow the pooled sample variance.
+    """
+    row_strata = np.asarray(row_strata)
+    _, inverse, sizes = np.unique(row_strata, return_inverse=True, return_counts=True)
+    sampled = inverse[positions]
+    sample = np.abs(np.asarray(values)[positions], dtype=np.float64)
+
+    k = len(sizes)
+    n_h = np.bincount(sampled, minlength=k)
+    sums = np.stack([np.bincount(sampled, sample[:, j], minlength=k) for j in range(sample.shape[1])], axis=1)
+    squares = np.stack([np.bincount(sampled, sample[:, j] ** 2, minlength=k) for j in range(sample.shape[1])], axis=1)
+
+    present = n_h > 0
+    n_h, sums, squares, sizes = n_h[present], sums[present], squares[present], sizes[present]
+    means = sums / n_h[:, None]
+    pooled = sample.var(axis=0, ddof=1) if len(sample) > 1 else np.zeros(sample.shape[1])
+    with np.errstate(invalid="ignore", divide="ignore"):
+        variances = np.where(n_h[:, None] > 1, (squares - n_h[:, None] * means ** 2) / (n_h[:, None] - 1), pooled)
+    variances = np.maximum(variances, 0)
+
+    # Strata that got no rows (budget below the number of strata) are left
+    # out and the remaining weights renormalised.
+    weights = sizes / sizes.sum()
+    estimate = weights @ means
+    fpc = 1 - n_h / sizes
+    std_error = np.sqrt((weights ** 2 * fpc / n_h) @ variances)
+    return (pd.DataFrame({"mean_abs": estimate, "std_error": std_error}, index=pd.Index(feature_names, name="feature"))
+            .sort_values("mean_abs", ascending=False))
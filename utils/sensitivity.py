@@ -0,0 +1,60 @@
+"""What-if price sensitivity sweeps for a single listing.
+
+Showing how an estimate moves as one feature changes means pricing the same
+car at every value of that feature, which as separate ``predict`` calls
+costs one full pass over the trees per point. :func:`sweep_grid` encodes the
+listing once, tiles it into one block per swept feature and overwrites that
+feature's column with the sweep values, so :func:`sweep` prices the whole
+grid with a single batched ``predict`` call.
+"""
+import numpy as np
+import pandas as pd
+
+from utils.encoding import FEATURES
+from utils.instrumentation import timed
+
+# Every value the Price Predictor's sliders can take
+NUMERIC_SWEEPS = {
+    "mileage": np.arange(0, 601),
+    "year": np.arange(1975, 2024),
+}
+CATEGORICAL_SWEEPS = ["engType", "drive"]
+
+
+def sweep_grid(encoder, row, numeric=None, categorical=None):
+    """Return ``(X, blocks)`` for the encoded listing ``row``.
+
+    ``X`` stacks one copy of ``row`` per sweep point. ``blocks`` maps each
+    swept feature to ``(values, rows)``: the values it takes (labels for
+    categoricals, which sweep the encoder's whole vocabulary) and the slice
+    of ``X`` holding them.
+    """
+    numeric = NUMERIC_SWEEPS if numeric is None else numeric
+    categorical = CATEGORICAL_SWEEPS if categorical is None else categorical
+    sweeps = {col: (np.asarray(values), np.asarray(values)) for col, values in numeric.items()}
+    for col in categorical:
+        vocabulary = encoder.vocabularies[col]
+        sweeps[col] = (pd.Index(vocabulary), np.arange(len(vocabulary)))
+
+    total = sum(len(codes) for _, codes in sweeps.values())
+    X = np.tile(np.asarray(row, dtype=np.float64), (total, 1))
+    blocks, start = {}, 0
+    for col, (values, codes) in sweeps.items():
+        rows = slice(start, start + len(codes))
+        X[rows, FEATURES.index(col)] = codes
+        blocks[col] = (values, rows)
+        start = rows.stop
+    return X, blocks
+
+
+@timed("predict")
+def sweep(bundle, row, numeric=None, categorical=None):
+    """Price the listing ``row`` across every sweep in one ``predict`` call.
+
+    Returns a dict mapping each swept feature to a Series of predicted
+    prices indexed by the feature's value.
+    """
+    X, blocks = sweep_grid(bundle.encoder, row, numeric, categorical)
+    prices = bundle.model.predict(pd.DataFrame(X, columns=FEATURES))
+    return {col: pd.Series(prices[rows], index=pd.Index(values, name=col), name="price")
+            for col, (values, rows) in blocks.items()}
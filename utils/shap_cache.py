@@ -0,0 +1,240 @@
+"""Persistent on-disk cache of SHAP values for the Explainability page.
+
+A full TreeSHAP pass over the cleaned dataset takes seconds, so its result is
+stored under ``.cache/shap/<key>/`` as float32 ``.npy`` files that are
+memory-mapped on load. The key combines the model artifact hash and the
+dataset fingerprint; a new model or a new listings file gets a new entry, and
+nothing is recomputed otherwise.
+
+The full pass can be spread over a pool of worker processes
+(``CARPRICE_SHAP_WORKERS``, default: one per CPU); each worker unpickles the
+model once and explains contiguous row chunks.
+
+Local explanations of a handful of rows do not need the full pass:
+:func:`explain_rows` runs TreeSHAP on just those rows and keeps recent
+results in a small in-process LRU. No lock is held while SHAP runs, so a
+local explanation never waits behind a global pass.
+"""
+import hashlib
+import json
+import multiprocessing
+import os
+import pickle
+import shutil
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from utils.caching import VersionedCache
+from utils.instrumentation import timed
+
+ROOT = Path(__file__).resolve().parent.parent
+CACHE_DIR = ROOT / ".cache" / "shap"
+
+FORMAT_VERSION = 1
+ARRAYS = ("values", "base_values", "data")
+LOCAL_CACHE_SIZE = 256
+SHAP_WORKERS = int(os.environ.get("CARPRICE_SHAP_WORKERS", os.cpu_count() or 1))
+MIN_CHUNK_ROWS = 1_000
+CHUNKS_PER_WORKER = 4
+
+_loaded = VersionedCache()
+_explainers = VersionedCache()
+_local_lock = threading.Lock()
+_local = OrderedDict()
+_worker_explainer = None
+
+
+@dataclass(frozen=True)
+class ShapResult:
+    """SHAP values, base values and feature matrix of one (model, dataset) pair."""
+    values: np.ndarray
+    base_values: np.ndarray
+    data: np.ndarray
+    feature_names: list
+    index: pd.Index
+    key: str
+
+    def explanation(self):
+        import shap
+
+        # Plain ndarray views of the memory maps: shap's slicer rejects np.memmap
+        return shap.Explanation(
+            values=np.asarray(self.values),
+            base_values=np.asarray(self.base_values),
+            data=np.asarray(self.data),
+            feature_names=self.feature_names,
+        )
+
+    def frame(self):
+        """The feature matrix as a DataFrame aligned with the cleaned dataset."""
+        return pd.DataFrame(self.data, index=self.index, columns=self.feature_names)
+
+
+def cache_key(model_hash, data_hash):
+    raw = f"{FORMAT_VERSION}:{model_hash}:{data_hash}".encode()
+    return hashlib.sha256(raw).hexdigest()[:24]
+
+
+@timed("explain")
+def get_shap_values(model, X, model_hash, data_hash, cache_dir=CACHE_DIR):
+    """Return the :class:`ShapResult` for ``X``, computing it only on a cache miss."""
+    key = cache_key(model_hash, data_hash)
+
+    def build():
+        directory = Path(cache_dir) / key
+        result = _read(directory, key)
+        if result is None:
+            _write(directory, compute_shap_values(model, X), X)
+            result = _read(directory, key)
+        return result
+
+    return _loaded.get(key, None, build)
+
+
+def is_cached(model_hash, data_hash, cache_dir=CACHE_DIR):
+    """True if the global values are loaded in this process or stored on disk."""
+    key = cache_key(model_hash, data_hash)
+    return _loaded.peek(key, None) is not None or (Path(cache_dir) / key / "meta.json").exists()
+
+
+def compute_shap_values(model, X, workers=None):
+    """Run TreeSHAP over ``X`` and return ``(values, base_values)`` as float32.
+
+    With more than one worker (default :data:`SHAP_WORKERS`) the rows are
+    split into chunks of at least :data:`MIN_CHUNK_ROWS` and explained in a
+    pool of spawned processes, each holding its own copy of the model. Chunks
+    are written straight into preallocated arrays at their row offsets, so
+    the result is identical to the serial pass.
+    """
+    import shap
+
+    workers = SHAP_WORKERS if workers is None else workers
+    workers = min(workers, len(X) // MIN_CHUNK_ROWS)
+    if workers <= 1:
+        return _explain(shap.TreeExplainer(model), X)
+
+    chunks = min(workers * CHUNKS_PER_WORKER, len(X) // MIN_CHUNK_ROWS)
+    bounds = np.linspace(0, len(X), chunks + 1).astype(int)
+    values = np.empty(X.shape, dtype=np.float32)
+    base_values = np.empty(len(X), dtype=np.float32)
+    # spawn, not fork: the app process runs Streamlit's threads
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(workers, mp_context=context, initializer=_init_worker,
+                             initargs=(pickle.dumps(model),)) as pool:
+        futures = {pool.submit(_explain_chunk, X.iloc[lo:hi]): lo
+                   for lo, hi in zip(bounds[:-1], bounds[1:])}
+        for future in as_completed(futures):
+            lo = futures[future]
+            chunk_values, chunk_base_values = future.result()
+            values[lo:lo + len(chunk_values)] = chunk_values
+            base_values[lo:lo + len(chunk_base_values)] = chunk_base_values
+    return values, base_values
+
+
+@timed("explain")
+def explain_rows(model, X, rows, model_hash, data_hash):
+    """Return a ``shap.Explanation`` for the rows of ``X`` at positions ``rows``.
+
+    Rows already covered by a loaded global entry are sliced from it;
+    otherwise TreeSHAP runs on just these rows. Either way the result is kept
+    in an LRU of recent requests.
+    """
+    import shap
+
+    rows = tuple(int(r) for r in rows)
+    key = (cache_key(model_hash, data_hash), rows)
+    with _local_lock:
+        cached = _local.get(key)
+        if cached is not None:
+            _local.move_to_end(key)
+            return cached
+
+    positions = list(rows)
+    result = _loaded.peek(key[0], None)
+    if result is not None:
+        values = np.asarray(result.values[positions])
+        base_values = np.asarray(result.base_values[positions])
+    else:
+        explanation = _explainer(model, model_hash)(X.iloc[positions])
+        values = np.asarray(explanation.values, dtype=np.float32)
+        base_values = np.asarray(explanation.base_values, dtype=np.float32)
+
+    explanation = shap.Explanation(
+        values=values,
+        base_values=base_values,
+        data=X.iloc[positions].to_numpy(dtype=np.float32),
+        feature_names=list(X.columns),
+    )
+    with _local_lock:
+        _local[key] = explanation
+        while len(_local) > LOCAL_CACHE_SIZE:
+            _local.popitem(last=False)
+    return explanation
+
+
+def _explainer(model, model_hash):
+    """One ``TreeExplainer`` per model; building it parses every tree."""
+    import shap
+
+    return _explainers.get(model_hash, None, lambda: shap.TreeExplainer(model))
+
+
+def _init_worker(payload):
+    """Pool initializer: unpickle the model and build its explainer once per process."""
+    global _worker_explainer
+    import shap
+
+    _worker_explainer = shap.TreeExplainer(pickle.loads(payload))
+
+
+def _explain_chunk(X):
+    return _explain(_worker_explainer, X)
+
+
+def _explain(explainer, X):
+    explanation = explainer(X)
+    return (np.asarray(explanation.values, dtype=np.float32),
+            np.asarray(explanation.base_values, dtype=np.float32))
+
+
+def _read(directory, key):
+    try:
+        with open(directory / "meta.json", encoding="utf-8") as f:
+            meta = json.load(f)
+        arrays = {name: np.load(directory / f"{name}.npy", mmap_mode="r") for name in ARRAYS}
+    except (OSError, ValueError):
+        return None
+    if meta.get("format") != FORMAT_VERSION:
+        return None
+    return ShapResult(
+        feature_names=meta["feature_names"],
+        index=pd.Index(np.load(directory / "index.npy")),
+        key=key,
+        **arrays,
+    )
+
+
+def _write(directory, shap_values, X):
+    """Write the entry into a scratch directory, then rename it into place."""
+    values, base_values = shap_values
+    tmp = directory.with_name(f"{directory.name}.{os.getpid()}.tmp")
+    tmp.mkdir(parents=True, exist_ok=True)
+    try:
+        np.save(tmp / "values.npy", values)
+        np.save(tmp / "base_values.npy", base_values)
+        np.save(tmp / "data.npy", X.to_numpy(dtype=np.float32))
+        np.save(tmp / "index.npy", X.index.to_numpy())
+        meta = {"format": FORMAT_VERSION, "feature_names": list(X.columns), "rows": len(X)}
+        (tmp / "meta.json").write_text(json.dumps(meta, indent=2), encoding="utf-8")
+        if directory.exists():
+            shutil.rmtree(directory)
+        os.replace(tmp, directory)
+    finally:
+        if tmp.exists():
+            shutil.rmtree(tmp)
@@ -0,0 +1,100 @@
+"""Background warm-up of the slow parts of the app.
+
+The home page starts a daemon thread that imports the heavy libraries and
+loads the dataset snapshot, the model, the encoded features and the global
+SHAP values into the process-wide caches, so the first visit to any other
+page finds them ready. Each step is timed as a ``warmup/...`` stage. Set
+``CARPRICE_WARMUP=0`` to disable it.
+
+This module must stay cheap to import: everything heavy is imported inside
+the thread.
+"""
+import importlib
+import os
+import threading
+import time
+
+_lock = threading.Lock()
+_done = threading.Event()
+_thread = None
+_timings = {}
+_errors = {}
+
+
+def start():
+    """Start the warm-up thread once per process; later calls are no-ops."""
+    global _thread
+    if os.environ.get("CARPRICE_WARMUP") == "0":
+        return None
+    with _lock:
+        if _thread is None:
+            _thread = threading.Thread(target=_run, name="warmup", daemon=True)
+            _thread.start()
+    return _thread
+
+
+def wait(timeout=None):
+    """Block until the warm-up has finished; returns False on timeout."""
+    return _done.wait(timeout)
+
+
+def status():
+    return {
+        "started": _thread is not None,
+        "done": _done.is_set(),
+        "seconds": dict(_timings),
+        "errors": dict(_errors),
+    }
+
+
+def _run():
+    try:
+        _step("import pandas", importlib.import_module, "pandas")
+        _step("import pyarrow", importlib.import_module, "pyarrow.feather")
+        _step("dataset", _load_dataset)
+        _step("import matplotlib", importlib.import_module, "matplotlib.pyplot")
+        _step("import seaborn", importlib.import_module, "seaborn")
+        _step("model", _load_model)
+        _step("encoded", _load_encoded)
+        _step("import shap", importlib.import_module, "shap")
+        _step("shap values", _load_shap_values)
+    finally:
+        _done.set()
+
+
+def _step(name, fn, *args):
+    # A failed step must never take the app down; the page will simply
+    # pay for it (and surface the error) on first use.
+    from utils.instrumentation import stage
+
+    start = time.perf_counter()
+    try:
+        with stage(f"warmup/{name}"):
+            fn(*args)
+    except Exception as exc:
+        _errors[name] = repr(exc)
+    _timings[name] = time.perf_counter() - start
+
+
+def _load_dataset():
+    from utils.data import load_dataset
+    load_dataset()
+
+
+def _load_model():
+    from utils.model_registry import get_model
+    get_model().load_all()
+
+
+def _load_encoded():
+    from utils.data import load_encoded
+    load_encoded()
+
+
+def _load_shap_values():
+    from utils.data import load_dataset, load_encoded
+    from utils.model_registry import get_model
+    from utils.shap_cache import get_shap_values
+
+    bundle = get_model()
+    get_shap_values(bundle.model, load_encoded(), bundle.content_hash, load_dataset().fingerprint)